@@ -0,0 +1,167 @@
+"""Compares the shared flat Grid against the layouts day_8, day_12 and day_14
+used before switching to it. Each comparison builds the same random puzzle in
+both layouts and times the part of the work that depends on the layout."""
+
+import pathlib as pl
+from time import perf_counter as timer
+from collections import deque
+import random
+import sys
+
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common.grid import Grid
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+SIZE = 400
+random.seed(2022)
+
+
+def report(name: str, old: float, new: float) -> None:
+    print(f"{name}: old layout {old:0.4f} sec, Grid {new:0.4f} sec ({old / new:0.1f}x)")
+
+
+# day_8: separate row and column copies versus row and column views.
+trees = ["".join(random.choice("0123456789") for _ in range(SIZE)) for _ in range(SIZE)]
+
+
+def tallest_per_line(lines) -> int:
+    return sum(max(line) for line in lines)
+
+
+start = timer()
+rows = [[int(cell) for cell in line] for line in trees]
+columns = [[rows[y][x] for y in range(SIZE)] for x in range(SIZE)]
+old_total = tallest_per_line(rows) + tallest_per_line(columns)
+old_time = timer() - start
+start = timer()
+field = Grid.from_lines(trees, int)
+new_total = tallest_per_line(field.rows()) + tallest_per_line(field.columns())
+new_time = timer() - start
+assert old_total == new_total
+report("day_8 parse and scan rows and columns", old_time, new_time)
+
+
+# day_12: list[str] indexed with (x, y) tuples versus a bordered flat grid.
+heights = [
+    "".join(random.choice(ALPHABET[:3]) for _ in range(SIZE)) for _ in range(SIZE)
+]
+
+
+def old_bfs(map_data: list[str]) -> int:
+    far_corner = len(map_data[0]) - 1, len(map_data) - 1
+    seen = {(0, 0)}
+    to_check = deque([(0, 0)])
+    while len(to_check) > 0:
+        x, y = to_check.popleft()
+        here = ALPHABET.index(map_data[y][x])
+        options = []
+        if x > 0:
+            options.append((x - 1, y))
+        if x < far_corner[0]:
+            options.append((x + 1, y))
+        if y > 0:
+            options.append((x, y - 1))
+        if y < far_corner[1]:
+            options.append((x, y + 1))
+        for option in options:
+            there = ALPHABET.index(map_data[option[1]][option[0]])
+            if option not in seen and there - here <= 1:
+                seen.add(option)
+                to_check.append(option)
+    return len(seen)
+
+
+def new_bfs(grid: Grid) -> int:
+    cells = grid.cells
+    visited = bytearray(grid.border_mask())
+    first = grid.index(0, 0)
+    visited[first] = 1
+    count = 1
+    to_check = deque([first])
+    while len(to_check) > 0:
+        current = to_check.popleft()
+        reachable = cells[current] + 1
+        for offset in grid.offsets:
+            option = current + offset
+            if not visited[option] and cells[option] <= reachable:
+                visited[option] = 1
+                count += 1
+                to_check.append(option)
+    return count
+
+
+start = timer()
+old_count = old_bfs(heights)
+old_time = timer() - start
+start = timer()
+grid = Grid.from_lines(heights, ALPHABET.index, border=1, border_value=255)
+new_count = new_bfs(grid)
+new_time = timer() - start
+assert old_count == new_count
+report("day_12 parse and breadth-first search", old_time, new_time)
+
+
+# day_14: a list of sets of x coordinates versus a byte per cell. Both caves
+# get a floor, so the sand fills up the whole triangle under the drop point.
+DEPTH = SIZE // 2
+walls = [
+    (random.randint(500 - DEPTH, 500 + DEPTH), random.randint(2, DEPTH - 2))
+    for _ in range(SIZE)
+]
+
+
+def old_fill(points: list[tuple[int, int]]) -> int:
+    layers: list[set[int]] = [set() for _ in range(DEPTH)]
+    for x, y in points:
+        layers[y].add(x)
+    floor = range(-(10**9), 10**9)
+    settled = 0
+    path = [500]
+    while len(path) > 0:
+        x, y = path[-1], len(path) - 1
+        below = layers[y + 1] if y + 1 < DEPTH else floor
+        if x not in below:
+            path.append(x)
+        elif x - 1 not in below:
+            path.append(x - 1)
+        elif x + 1 not in below:
+            path.append(x + 1)
+        else:
+            layers[y].add(x)
+            settled += 1
+            path.pop()
+    return settled
+
+
+def new_fill(points: list[tuple[int, int]]) -> int:
+    cave = Grid(2 * DEPTH + 3, DEPTH + 1, left=500 - DEPTH - 1)
+    for point in points:
+        cave[point] = 1
+    cave.cells[-cave.stride :] = bytes([1]) * cave.stride
+    cells = cave.cells
+    settled = 0
+    path = [cave.index(500, 0)]
+    while len(path) > 0:
+        position = path[-1]
+        below = position + cave.stride
+        if not cells[below]:
+            path.append(below)
+        elif not cells[below - 1]:
+            path.append(below - 1)
+        elif not cells[below + 1]:
+            path.append(below + 1)
+        else:
+            cells[position] = 2
+            settled += 1
+            path.pop()
+    return settled
+
+
+start = timer()
+old_settled = old_fill(walls)
+old_time = timer() - start
+start = timer()
+new_settled = new_fill(walls)
+new_time = timer() - start
+assert old_settled == new_settled
+report("day_14 fill the cave with sand", old_time, new_time)
@@ -0,0 +1,3 @@
+from .grid import Coordinate, Grid
+from .search import AdjacencyGraph, SearchResult
+from .intervals import IntervalSet
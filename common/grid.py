@@ -0,0 +1,132 @@
+from typing import Callable, Iterator
+
+Coordinate = tuple[int, int]
+
+
+class Grid:
+    """A rectangular grid of small values (0-255), stored flat in a bytearray,
+    row after row. Coordinate (x, y) lives at index
+    (y - top + border) * stride + (x - left + border), where left and top
+    are the coordinates of the top-left cell and stride is the width of a
+    full row including the border.
+
+    With a border of at least one cell, the four neighbours of any real cell
+    are always at the same index offsets from it (see offsets), so stepping
+    around needs no bounds checks. Rows and columns can be taken as
+    memoryviews into the grid itself, without copying anything."""
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        fill: int = 0,
+        border: int = 0,
+        border_value: int = 0,
+        left: int = 0,
+        top: int = 0,
+    ):
+        self.width: int = width
+        self.height: int = height
+        self.border: int = border
+        self.left: int = left
+        self.top: int = top
+        self.stride: int = width + 2 * border
+        total_height = height + 2 * border
+        self.cells: bytearray = bytearray([border_value]) * (self.stride * total_height)
+        if border == 0 or fill != border_value:
+            for y in range(height):
+                start = self.index(left, top + y)
+                self.cells[start : start + width] = bytes([fill]) * width
+        # Index offsets to the left, right, up and down neighbours.
+        self.offsets: tuple[int, int, int, int] = (-1, 1, -self.stride, self.stride)
+
+    @classmethod
+    def from_lines(
+        cls,
+        lines: list[str],
+        translate: Callable[[str], int],
+        border: int = 0,
+        border_value: int = 0,
+    ) -> "Grid":
+        """Builds a grid from a list of equally long strings, one per row,
+        turning each character into a cell value with translate. Empty lines
+        at the end (a trailing newline in the input, say) are left out; any
+        other row of the wrong length is an error."""
+        height = len(lines)
+        while height > 0 and lines[height - 1] == "":
+            height -= 1
+        if height == 0:
+            raise ValueError("No rows to build a grid from.")
+        grid = cls(len(lines[0]), height, 0, border, border_value)
+        lookup: dict[str, int] = dict()
+        for y, line in enumerate(lines[:height]):
+            if len(line) != grid.width:
+                raise ValueError(
+                    f"Row {y} is {len(line)} long, expected {grid.width}: {line!r}"
+                )
+            for char in line:
+                if char not in lookup:
+                    lookup[char] = translate(char)
+            start = grid.index(0, y)
+            grid.cells[start : start + grid.width] = bytes(
+                lookup[char] for char in line
+            )
+        return grid
+
+    def index(self, x: int, y: int) -> int:
+        return (y - self.top + self.border) * self.stride + (
+            x - self.left + self.border
+        )
+
+    def coordinate(self, index: int) -> Coordinate:
+        y, x = divmod(index, self.stride)
+        return x - self.border + self.left, y - self.border + self.top
+
+    def __getitem__(self, point: Coordinate) -> int:
+        return self.cells[self.index(*point)]
+
+    def __setitem__(self, point: Coordinate, value: int) -> None:
+        self.cells[self.index(*point)] = value
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return (
+            self.left <= x < self.left + self.width
+            and self.top <= y < self.top + self.height
+        )
+
+    def row(self, y: int) -> memoryview:
+        """The cells of one row, as a view into the grid."""
+        start = self.index(self.left, y)
+        return memoryview(self.cells)[start : start + self.width]
+
+    def column(self, x: int) -> memoryview:
+        """The cells of one column, as a (strided) view into the grid."""
+        start = self.index(x, self.top)
+        end = start + (self.height - 1) * self.stride + 1
+        return memoryview(self.cells)[start : end : self.stride]
+
+    def rows(self) -> Iterator[memoryview]:
+        return (self.row(y) for y in range(self.top, self.top + self.height))
+
+    def columns(self) -> Iterator[memoryview]:
+        return (self.column(x) for x in range(self.left, self.left + self.width))
+
+    def neighbours(self, index: int) -> Iterator[int]:
+        """Indices of the cells left, right, above and below the given one.
+        Only safe to use without checks on grids with a border."""
+        return (index + offset for offset in self.offsets)
+
+    def border_mask(self) -> bytes:
+        """1 for every border cell, 0 for every real cell; handy as the
+        starting point for a "visited" array that never steps off the grid."""
+        mask = bytearray([1]) * len(self.cells)
+        for y in range(self.top, self.top + self.height):
+            start = self.index(self.left, y)
+            mask[start : start + self.width] = bytes(self.width)
+        return bytes(mask)
+
+    def real_indices(self) -> Iterator[int]:
+        """Indices of every cell that is not part of the border, in order."""
+        for y in range(self.top, self.top + self.height):
+            start = self.index(self.left, y)
+            yield from range(start, start + self.width)
@@ -0,0 +1,122 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+
+# Half-open range of integers, (start, end) covers start up to but not
+# including end.
+Interval = tuple[int, int]
+
+
+class IntervalSet:
+    """A set of integers stored as sorted, disjoint, half-open intervals.
+    Intervals that overlap or touch are merged as they are added, so the set
+    never has to be sorted or merged again afterwards. Finding where an
+    interval goes is a binary search, but putting it there shifts everything
+    after it along the lists, so add and discard take time linear in the
+    number of stored intervals (a memory move; cheap for a few thousand
+    intervals, not for millions). Membership, overlap and cover checks are
+    O(log n), and the total length is kept up to date as intervals are added
+    and removed."""
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.length: int = 0
+        for start, end in intervals:
+            self.add(start, end)
+
+    def add(self, start: int, end: int) -> None:
+        if start >= end:
+            return
+        # Every stored interval from first up to last overlaps or touches the
+        # new one, and gets merged into it.
+        first = bisect_left(self.ends, start)
+        last = bisect_right(self.starts, end)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+            self.length -= sum(
+                self.ends[index] - self.starts[index] for index in range(first, last)
+            )
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+        self.length += end - start
+
+    def discard(self, start: int, end: int) -> None:
+        """Removes every integer from start up to end, where present."""
+        if start >= end:
+            return
+        first = bisect_right(self.ends, start)
+        last = bisect_left(self.starts, end)
+        if first >= last:
+            return
+        kept_starts: list[int] = []
+        kept_ends: list[int] = []
+        if self.starts[first] < start:
+            kept_starts.append(self.starts[first])
+            kept_ends.append(start)
+        if self.ends[last - 1] > end:
+            kept_starts.append(end)
+            kept_ends.append(self.ends[last - 1])
+        self.length -= sum(
+            self.ends[index] - self.starts[index] for index in range(first, last)
+        )
+        self.length += sum(b - a for a, b in zip(kept_starts, kept_ends))
+        self.starts[first:last] = kept_starts
+        self.ends[first:last] = kept_ends
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        retval = IntervalSet(self)
+        for start, end in other:
+            retval.add(start, end)
+        return retval
+
+    def clip(self, start: int, end: int) -> "IntervalSet":
+        """The part of this set from start up to end."""
+        retval = IntervalSet()
+        first = bisect_right(self.ends, start)
+        last = bisect_left(self.starts, end)
+        for index in range(first, last):
+            retval.add(max(start, self.starts[index]), min(end, self.ends[index]))
+        return retval
+
+    def total_length(self) -> int:
+        return self.length
+
+    def gaps(self, start: int, end: int) -> list[Interval]:
+        """The parts from start up to end that are not in this set."""
+        retval: list[Interval] = []
+        position = start
+        for covered_start, covered_end in self.clip(start, end):
+            if covered_start > position:
+                retval.append((position, covered_start))
+            position = covered_end
+        if position < end:
+            retval.append((position, end))
+        return retval
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True if any integer from start up to end is in this set."""
+        if start >= end:
+            return False
+        index = bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def covers(self, start: int, end: int) -> bool:
+        """True if every integer from start up to end is in this set."""
+        if start >= end:
+            return True
+        index = bisect_right(self.starts, start) - 1
+        return index >= 0 and self.ends[index] >= end
+
+    def __contains__(self, value: int) -> bool:
+        index = bisect_right(self.starts, value) - 1
+        return index >= 0 and value < self.ends[index]
+
+    def __iter__(self) -> Iterator[Interval]:
+        return zip(self.starts, self.ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self)})"
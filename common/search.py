@@ -0,0 +1,302 @@
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import cache
+import heapq as hq
+
+from .grid import Grid
+
+# Neighbours of a node, as node ids; or, for the weighted searches, as
+# (node id, cost) pairs.
+Neighbours = Callable[[int], Iterable[int]]
+WeightedNeighbours = Callable[[int], Iterable[tuple[int, int]]]
+
+UNREACHED = -1
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """Outcome of a search over nodes 0 up to node_count. distances holds the
+    cost from the nearest source to every node, or UNREACHED. predecessors,
+    if asked for, holds the previous node on that cheapest path, or
+    UNREACHED for sources and nodes that were not reached."""
+
+    distances: list[int]
+    predecessors: list[int] | None = None
+
+    def path_to(self, target: int) -> list[int]:
+        """The nodes on the cheapest path from a source to the target, both
+        included. Needs the search to have kept predecessors."""
+        if self.predecessors is None:
+            raise ValueError("Search did not keep predecessors.")
+        if self.distances[target] == UNREACHED:
+            return []
+        path = [target]
+        while self.predecessors[path[-1]] != UNREACHED:
+            path.append(self.predecessors[path[-1]])
+        path.reverse()
+        return path
+
+
+class AdjacencyGraph:
+    """A fixed graph in compressed form: the neighbours of node n are
+    targets[starts[n]:starts[n + 1]], with matching costs in weights."""
+
+    def __init__(self, node_count: int, edges: Iterable[tuple[int, int, int]]):
+        """Takes (from, to, cost) triples. Edges only go one way."""
+        per_node: list[list[tuple[int, int]]] = [[] for _ in range(node_count)]
+        for start, end, cost in edges:
+            per_node[start].append((end, cost))
+        self.node_count: int = node_count
+        self.starts: array = array("l", [0])
+        self.targets: array = array("l")
+        self.weights: array = array("l")
+        for options in per_node:
+            for end, cost in options:
+                self.targets.append(end)
+                self.weights.append(cost)
+            self.starts.append(len(self.targets))
+
+    def neighbours(self, node: int) -> Iterable[int]:
+        return self.targets[self.starts[node] : self.starts[node + 1]]
+
+    def weighted_neighbours(self, node: int) -> Iterable[tuple[int, int]]:
+        start, end = self.starts[node], self.starts[node + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+
+def multi_source_bfs(
+    node_count: int,
+    sources: Iterable[int],
+    neighbours: Neighbours,
+    target: int | None = None,
+    keep_predecessors: bool = False,
+) -> SearchResult:
+    """Breadth-first search from all sources at once, with every step costing
+    one. Stops early once the target (if any) is reached."""
+    distances = [UNREACHED] * node_count
+    predecessors = [UNREACHED] * node_count if keep_predecessors else None
+    to_check: deque[int] = deque()
+    for source in sources:
+        if distances[source] == UNREACHED:
+            distances[source] = 0
+            to_check.append(source)
+    while len(to_check) > 0:
+        current = to_check.popleft()
+        if current == target:
+            break
+        steps = distances[current] + 1
+        for option in neighbours(current):
+            if distances[option] != UNREACHED:
+                continue
+            distances[option] = steps
+            if predecessors is not None:
+                predecessors[option] = current
+            to_check.append(option)
+    return SearchResult(distances, predecessors)
+
+
+def bfs(
+    node_count: int,
+    source: int,
+    neighbours: Neighbours,
+    target: int | None = None,
+    keep_predecessors: bool = False,
+) -> SearchResult:
+    return multi_source_bfs(
+        node_count, (source,), neighbours, target, keep_predecessors
+    )
+
+
+def dijkstra(
+    node_count: int,
+    sources: Iterable[int],
+    neighbours: WeightedNeighbours,
+    target: int | None = None,
+    keep_predecessors: bool = False,
+) -> SearchResult:
+    """Cheapest paths from the nearest of the sources, for non-negative costs.
+    Stops early once the target (if any) is settled; see a_star."""
+    return a_star(
+        node_count, sources, neighbours, lambda _: 0, target, keep_predecessors
+    )
+
+
+def a_star(
+    node_count: int,
+    sources: Iterable[int],
+    neighbours: WeightedNeighbours,
+    heuristic: Callable[[int], int],
+    target: int | None = None,
+    keep_predecessors: bool = False,
+) -> SearchResult:
+    """Cheapest paths from the nearest of the sources, guided by the heuristic
+    (which must never overestimate the cost to the target, and must be
+    consistent). Stops once the target is settled; the distances of nodes
+    that were not settled by then may be higher than their cheapest cost.
+
+    Nodes whose cost improves are pushed onto the heap again rather than
+    updated in place; the outdated entries are skipped when they come off
+    (lazy deletion), so there is never a scan over the queue."""
+    distances = [UNREACHED] * node_count
+    predecessors = [UNREACHED] * node_count if keep_predecessors else None
+    settled = bytearray(node_count)
+    queue: list[tuple[int, int]] = []
+    for source in sources:
+        distances[source] = 0
+        queue.append((heuristic(source), source))
+    hq.heapify(queue)
+    while len(queue) > 0:
+        _, current = hq.heappop(queue)
+        if settled[current]:
+            continue
+        settled[current] = 1
+        if current == target:
+            break
+        cost_here = distances[current]
+        for option, cost in neighbours(current):
+            if settled[option]:
+                continue
+            cost_there = cost_here + cost
+            if distances[option] != UNREACHED and distances[option] <= cost_there:
+                continue
+            distances[option] = cost_there
+            if predecessors is not None:
+                predecessors[option] = current
+            hq.heappush(queue, (cost_there + heuristic(option), option))
+    return SearchResult(distances, predecessors)
+
+
+@cache
+def step_table(lowest_step: int | None, highest_step: int | None) -> list[bytes]:
+    """For every cell value (0-255), a row with a 1 for every value that may
+    not be stepped onto from it; one lookup per step instead of two
+    comparisons. Built once per pair of limits."""
+    lowest = -256 if lowest_step is None else lowest_step
+    highest = 256 if highest_step is None else highest_step
+    table: list[bytes] = []
+    for here in range(256):
+        # Values from low up to high may be stepped onto.
+        low = max(0, min(256, here + lowest))
+        high = max(low, min(256, here + highest + 1))
+        table.append(b"\x01" * low + bytes(high - low) + b"\x01" * (256 - high))
+    return table
+
+
+def grid_bfs(
+    grid: Grid,
+    sources: Iterable[int],
+    blocked: bytes,
+    lowest_step: int | None = None,
+    highest_step: int | None = None,
+    target: int | None = None,
+    keep_predecessors: bool = False,
+) -> SearchResult:
+    """multi_source_bfs over the cells of a grid with a border, without a
+    neighbours callback: a step goes to any of the four neighbours that is not
+    marked in blocked (grid.border_mask(), say), and whose value differs from
+    the current one by lowest_step up to highest_step, both included. None
+    means no limit in that direction. With a target, the search stops once
+    the target's distance is known."""
+    cells = grid.cells
+    offsets = grid.offsets
+    forbidden_from = step_table(lowest_step, highest_step)
+    distances = [UNREACHED] * len(cells)
+    predecessors = [UNREACHED] * len(cells) if keep_predecessors else None
+    seen = bytearray(blocked)
+    frontier: list[int] = []
+    for source in sources:
+        if not seen[source]:
+            seen[source] = 1
+            distances[source] = 0
+            frontier.append(source)
+    # Every node in the frontier is the same number of steps away, so the
+    # search goes one whole frontier at a time instead of node by node.
+    steps = 0
+    while len(frontier) > 0 and (target is None or distances[target] == UNREACHED):
+        steps += 1
+        next_frontier: list[int] = []
+        append = next_frontier.append
+        for current in frontier:
+            forbidden = forbidden_from[cells[current]]
+            for offset in offsets:
+                option = current + offset
+                if seen[option] or forbidden[cells[option]]:
+                    continue
+                seen[option] = 1
+                distances[option] = steps
+                if predecessors is not None:
+                    predecessors[option] = current
+                append(option)
+        frontier = next_frontier
+    return SearchResult(distances, predecessors)
+
+
+def grid_a_star(
+    grid: Grid,
+    sources: Iterable[int],
+    target: int,
+    blocked: bytes,
+    lowest_step: int | None = None,
+    highest_step: int | None = None,
+    keep_predecessors: bool = False,
+) -> SearchResult:
+    """a_star over the cells of a grid with a border, stepping as in grid_bfs
+    at a cost of one per step, with the manhattan distance to the target as
+    the heuristic. Everything happens inline; there is no callback per node
+    or step.
+
+    Costs and estimates are small integers, and with this heuristic the
+    estimate of the node being settled never goes down. So instead of a heap,
+    the queue is a list of buckets, one per estimate, worked through in
+    order; pushing and popping are plain list appends and pops."""
+    cells = grid.cells
+    offsets = grid.offsets
+    stride = grid.stride
+    target_y, target_x = divmod(target, stride)
+    forbidden_from = step_table(lowest_step, highest_step)
+    # No path is longer than the number of cells, so that works as "not
+    # reached yet" and needs no separate check; swapped for UNREACHED at the end.
+    far = len(cells)
+    distances = [far] * len(cells)
+    predecessors = [UNREACHED] * len(cells) if keep_predecessors else None
+    settled = bytearray(blocked)
+    buckets: list[list[int]] = []
+    for source in sources:
+        distances[source] = 0
+        y, x = divmod(source, stride)
+        estimate = abs(x - target_x) + abs(y - target_y)
+        while len(buckets) <= estimate:
+            buckets.append([])
+        buckets[estimate].append(source)
+    estimate = 0
+    while estimate < len(buckets):
+        bucket = buckets[estimate]
+        if len(bucket) == 0:
+            estimate += 1
+            continue
+        current = bucket.pop()
+        if settled[current]:
+            continue
+        settled[current] = 1
+        if current == target:
+            break
+        cost_there = distances[current] + 1
+        forbidden = forbidden_from[cells[current]]
+        for offset in offsets:
+            option = current + offset
+            if settled[option] or forbidden[cells[option]]:
+                continue
+            if distances[option] <= cost_there:
+                continue
+            distances[option] = cost_there
+            if predecessors is not None:
+                predecessors[option] = current
+            y, x = divmod(option, stride)
+            option_estimate = cost_there + abs(x - target_x) + abs(y - target_y)
+            while len(buckets) <= option_estimate:
+                buckets.append([])
+            buckets[option_estimate].append(option)
+    distances = [UNREACHED if cost == far else cost for cost in distances]
+    return SearchResult(distances, predecessors)
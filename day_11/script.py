@@ -1,9 +1,24 @@
 import pathlib as pl
-from collections.abc import Callable
 from time import perf_counter as timer
-from math import floor, prod
+from math import prod
 import re
 
+try:
+    import numpy as np
+except ImportError:
+    # Without numpy, star two always takes the item-by-item path.
+    np = None
+
+# Opcodes for the monkey operations. Every operation in the input is one of
+# "old + N", "old * N" or "old * old", so an (opcode, operand) pair is enough
+# to describe it without building a function per monkey.
+OP_ADD = 0
+OP_MUL = 1
+OP_SQUARE = 2
+# Below this many items in total, numpy's per-call overhead costs more than
+# the array operations save, and the item-by-item loop is faster.
+ARRAY_MIN_ITEMS = 100
+
 
 class Monkey:
     def __init__(
@@ -18,28 +33,35 @@ class Monkey:
         self.id: int = id
         self.item_list: list[int] = initial_items
         _, op, num = operation.split(" ")
-        oper: Callable[[int], int] = None
         if op == "*" and num == "old":
-            oper = lambda x: x * x
+            self.opcode, self.operand = OP_SQUARE, 0
         elif op == "*":
-            num = int(num)
-            oper = lambda x: x * num
+            self.opcode, self.operand = OP_MUL, int(num)
         else:
-            num = int(num)
-            oper = lambda x: x + num
-        self.operation: Callable[[int], int] = oper
+            self.opcode, self.operand = OP_ADD, int(num)
         self.test: int = test
         self.fail_monkey: int = fail
         self.pass_monkey: int = pass_
         self.items_checked: int = 0
         self.max_test = test
 
+    def operation(self, item):
+        """Applies this monkey's operation to a single worry level, or to a
+        whole numpy array of them at once."""
+        if self.opcode == OP_SQUARE:
+            return item * item
+        if self.opcode == OP_MUL:
+            return item * self.operand
+        return item + self.operand
+
     def check_all_items(self, relief=True) -> dict[int, list[int]]:
         retval = {self.pass_monkey: [], self.fail_monkey: []}
         self.items_checked += len(self.item_list)
         for item in self.item_list:
             item = self.operation(item)
-            item = int(floor(item / 3)) if relief else item % self.max_test
+            # Integer division; dividing as a float and flooring loses
+            # precision once the worry levels get large.
+            item = item // 3 if relief else item % self.max_test
             if item % self.test == 0:
                 retval[self.pass_monkey].append(item)
             else:
@@ -48,6 +70,36 @@ class Monkey:
         return retval
 
 
+def play_rounds_array(monkeys: list[Monkey], rounds: int, modulus: int) -> None:
+    """Plays the given number of rounds without relief, keeping every worry
+    level below the modulus. Each monkey's items are held in numpy int64
+    arrays, so a turn is a handful of array operations instead of a loop over
+    the items. Updates items_checked (and item_list, once done) on each
+    monkey."""
+    # Squaring happens before the modulus is applied, so the largest value seen
+    # is (modulus - 1) squared. That needs to fit in an int64.
+    if (modulus - 1) ** 2 >= 2**63:
+        raise ValueError(f"Modulus {modulus} too large for int64 worry levels.")
+    pending: list[list] = [
+        [np.array(monkey.item_list, dtype=np.int64) % modulus] for monkey in monkeys
+    ]
+    for _ in range(rounds):
+        for monkey in monkeys:
+            held = pending[monkey.id]
+            if len(held) == 0:
+                continue
+            items = held[0] if len(held) == 1 else np.concatenate(held)
+            held.clear()
+            monkey.items_checked += len(items)
+            items = monkey.operation(items)
+            items %= modulus
+            passed = items % monkey.test == 0
+            pending[monkey.pass_monkey].append(items[passed])
+            pending[monkey.fail_monkey].append(items[~passed])
+    for monkey in monkeys:
+        monkey.item_list = [int(item) for items in pending[monkey.id] for item in items]
+
+
 def grouper(iterable, size):
     iterators = [iter(iterable)] * size
     return zip(*iterators)
@@ -104,6 +156,10 @@ def star_two(data: list[Monkey]) -> str:
     monkeys = prep_monkeys(data)
     max_test = prod(set(mnk.test for mnk in monkeys))
     print(f"Product of all testing thresholds: {max_test}")
+    if np is not None and sum(len(mnk.item_list) for mnk in monkeys) >= ARRAY_MIN_ITEMS:
+        play_rounds_array(monkeys, 10000, max_test)
+        monkeys.sort(key=lambda monkey: monkey.items_checked, reverse=True)
+        return str(monkeys[0].items_checked * monkeys[1].items_checked)
     for monkey in monkeys:
         monkey.max_test = max_test
     for i in range(10000):
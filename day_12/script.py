@@ -1,18 +1,17 @@
 import pathlib as pl
-from dataclasses import dataclass, field
 from time import perf_counter as timer
-import heapq as hq
-from collections import defaultdict
+from dataclasses import dataclass
+import sys
+
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common import search
+from common.grid import Grid
 
-Coordinate = tuple[int, int]
 ALPHABET = "abcdefghijklmnopqrstuvwxyz"
 CLEANUP = {"S": "a", "E": "z"}
-
-
-@dataclass(slots=True, order=True)
-class NavNode:
-    distance: int = 0
-    position: Coordinate = field(default=(0, 0), compare=False)
+# Height of the cells in the border around the map. Never actually compared;
+# border cells are marked as off-limits before any search starts.
+BORDER = 255
 
 
 my_dir: pl.Path = pl.Path(__file__).parent
@@ -25,160 +24,128 @@ print(f"Field size WxH: {len(parsed_data[0])}x{len(parsed_data)}")
 print(*parsed_data, sep="\n")
 
 
-def initial_coordinates(data: list[str]) -> tuple[Coordinate, Coordinate]:
-    start_coord = None
-    end_coord = None
+@dataclass(slots=True)
+class HeightMap:
+    """The map, parsed once into a grid of heights (0 for a, 25 for z). The
+    grid has a one-cell border, so the four neighbours of any real cell are
+    always at the same index offsets from it, without needing bounds checks."""
+
+    grid: Grid
+    # 1 for every border cell, 0 for every real cell. Copied to start off the
+    # "visited" markers of a search, so the border is never stepped onto.
+    off_grid: bytes
+    start: int
+    end: int
+
+
+def parse_heightmap(data: list[str]) -> HeightMap:
+    grid = Grid.from_lines(
+        data,
+        lambda char: ALPHABET.index(CLEANUP.get(char, char)),
+        border=1,
+        border_value=BORDER,
+    )
+    start = end = -1
     for y, line in enumerate(data):
-        for x, char in enumerate(line):
-            if char == "S":
-                start_coord = (x, y)
-            if char == "E":
-                end_coord = (x, y)
-        if start_coord is not None and end_coord is not None:
-            break
-    return start_coord, end_coord
-
-
-def step_delta(map_data: list[str], start: Coordinate, end: Coordinate) -> int:
-    xa, ya = start
-    xb, yb = end
-    height_start = map_data[ya][xa]
-    height_end = map_data[yb][xb]
-    height_start = CLEANUP.get(height_start, height_start)
-    height_end = CLEANUP.get(height_end, height_end)
-    height_start = ALPHABET.index(height_start)
-    height_end = ALPHABET.index(height_end)
-    return height_end - height_start
-
-
-def distance(start: Coordinate, end: Coordinate) -> int:
-    dx = abs(start[0] - end[0])
-    dy = abs(start[1] - end[1])
-    return dx + dy
-
-
-def adjacent_coords(
-    center: Coordinate, far_corner: Coordinate
-) -> tuple[Coordinate, ...]:
-    retval: list[Coordinate] = []
-    x, y = center
-    up = x, y - 1
-    down = x, y + 1
-    left = x - 1, y
-    right = x + 1, y
-    if x > 0:
-        retval.append(left)
-    if x < far_corner[0]:
-        retval.append(right)
-    if y > 0:
-        retval.append(up)
-    if y < far_corner[1]:
-        retval.append(down)
-    return tuple(retval)
-
-
-def track_back(
-    paths: list[list[Coordinate | None]], start: Coordinate, end: Coordinate
-) -> int:
+        if "S" in line:
+            start = grid.index(line.index("S"), y)
+        if "E" in line:
+            end = grid.index(line.index("E"), y)
+    return HeightMap(grid, grid.border_mask(), start, end)
+
+
+def distance(heightmap: HeightMap, start: int, end: int) -> int:
+    xa, ya = heightmap.grid.coordinate(start)
+    xb, yb = heightmap.grid.coordinate(end)
+    return abs(xa - xb) + abs(ya - yb)
+
+
+def track_back(paths: list[int], start: int, end: int) -> int | None:
+    """Number of steps from start to end, following the camefrom map back from
+    the end. None if the search never reached the end."""
+    if end != start and paths[end] < 0:
+        return None
     steps: int = 0
-    current: Coordinate = end
+    current: int = end
     while current != start:
         steps += 1
-        current = paths[current[1]][current[0]]
+        current = paths[current]
     return steps
 
 
-def print_map(paths: list[list[Coordinate | None]]) -> None:
-    translation = {(1, 0): "<", (-1, 0): ">", (0, 1): "^", (0, -1): "v"}
-    for y, line in enumerate(paths):
-        for x, point in enumerate(line):
-            if point is None:
-                print(" ", end="")
-                continue
-            dx = x - point[0]
-            dy = y - point[1]
-            print(translation[(dx, dy)], end="")
-        print("")
-
-
-def a_star(
-    map_data: list[str], start: Coordinate, end: Coordinate
-) -> list[list[Coordinate | None]]:
-    map_end = len(map_data[0]) - 1, len(map_data) - 1
-    # Let the record state: I did this calculation wrong initially and made the
-    # sentinel "this place has not been visited yet" value small enough that it
-    # could actually show up. The factor 10 should *should* fix this.
-    default_distance = map_end[0] * map_end[1] * 10
-
-    # camefrom map; lists which direction to go from each coordinate.
-    reverse_map: list[list[Coordinate | None]] = [
-        [None] * len(map_data[0]) for _ in range(len(map_data))
-    ]
-
-    # gScore; cheapest path cost from start to given coordinate.
-    cost_to: dict[Coordinate, int] = defaultdict(lambda: default_distance)
-    cost_to[start] = 0
-
-    # fScore; "best guess" final path cost
-    cost_forward: dict[Coordinate, int] = defaultdict(lambda: default_distance)
-    cost_forward[start] = distance(start, end)
-
-    # Instead of tracking the fScore separately, the 'distance' field of the
-    # NavNode objects will track that information.
-    open_queue: list[NavNode] = [NavNode(distance(start, end), start)]
-    best: NavNode = NavNode(distance(start, end), start)
-    print(f"Navigating from {start} to {end} (distance {best.distance})")
-
-    while len(open_queue) > 0:
-        candidate_point = hq.heappop(open_queue).position
-        # print(f"Checking around {candidate_point}")
-        if candidate_point == end:
-            break
-        neighbours = adjacent_coords(candidate_point, map_end)
-        for option in neighbours:
-            # print(f"assessing {option}")
-            calc_distance = cost_to[candidate_point] + 1
-            height = step_delta(map_data, candidate_point, option)
-            if height <= 1 and calc_distance < cost_to[option]:
-                # print(f"{option} potentially next step.")
-                reverse_map[option[1]][option[0]] = candidate_point
-                cost_to[option] = calc_distance
-                if not any(item.position == option for item in open_queue):
-                    open_queue.append(
-                        NavNode(calc_distance + distance(option, end), option)
-                    )
-                    # print(f"{open_queue[-1]} added for further checking.")
-        hq.heapify(open_queue)
-        # print(f"{len(open_queue)} nodes to check. ({';'.join(str(x) for x in open_queue)})")
-    return reverse_map
-
-
-def star_one(data: list[str]) -> tuple[str, list[list[Coordinate | None]]]:
-    start, end = initial_coordinates(data)
-    path = a_star(data, start, end)
-    print_map(path)
-    dist = track_back(path, start, end)
+def print_map(heightmap: HeightMap, paths: list[int]) -> None:
+    grid = heightmap.grid
+    translation = {1: "<", -1: ">", grid.stride: "^", -grid.stride: "v"}
+    for y in range(grid.height):
+        line = ""
+        for x in range(grid.width):
+            index = grid.index(x, y)
+            if paths[index] < 0:
+                line += " "
+            else:
+                line += translation[index - paths[index]]
+        print(line)
+
+
+def a_star(heightmap: HeightMap, start: int, end: int) -> list[int]:
+    """Returns a flat camefrom map: for every index, the index of the previous
+    step on the cheapest path found to it, or -1."""
+    grid = heightmap.grid
+    print(
+        f"Navigating from {grid.coordinate(start)} to {grid.coordinate(end)} "
+        f"(distance {distance(heightmap, start, end)})"
+    )
+    # At most one step up, any amount down.
+    result = search.grid_a_star(
+        grid, (start,), end, heightmap.off_grid, highest_step=1, keep_predecessors=True
+    )
+    return result.predecessors
+
+
+def reverse_bfs(heightmap: HeightMap, end: int) -> list[int]:
+    """Breadth-first search backwards from the end point, stepping only where
+    the forward step would be allowed (at most one up, any amount down).
+    Returns the number of steps from every index to the end, or -1 for
+    indices that cannot reach the end at all."""
+    # Reversed: the step has to be valid going from the option to here.
+    result = search.grid_bfs(heightmap.grid, (end,), heightmap.off_grid, lowest_step=-1)
+    return result.distances
+
+
+def shortest_from(steps_to_end: list[int], starts: list[int]) -> int | None:
+    """Looks up the shortest distance to the end from any of the given starting
+    indices, using the result of reverse_bfs. None if none of them can reach
+    the end."""
+    options = [steps_to_end[start] for start in starts if steps_to_end[start] >= 0]
+    return min(options, default=None)
+
+
+def star_one(heightmap: HeightMap) -> tuple[str, list[int]]:
+    path = a_star(heightmap, heightmap.start, heightmap.end)
+    print_map(heightmap, path)
+    dist = track_back(path, heightmap.start, heightmap.end)
+    if dist is None:
+        print("The end cannot be reached from the start.")
     return str(dist), path
 
 
-def star_two(data: list[list[str]]) -> str:
-    start, end = initial_coordinates(data)
-    print(f"{start} -> {end}")
-    lengths: list[int] = []
-    for i in range(len(data)):
-        real_start = (start[0], i)
-        path = a_star(data, real_start, end)
-        length = track_back(path, real_start, end)
-        print(f"starting from {real_start} gives {length} steps to the end.")
-        lengths.append(length)
-    return str(min(lengths))
+def star_two(heightmap: HeightMap) -> str:
+    grid = heightmap.grid
+    print(f"{grid.coordinate(heightmap.start)} -> {grid.coordinate(heightmap.end)}")
+    # One search backwards from the end covers every possible starting point.
+    steps_to_end = reverse_bfs(heightmap, heightmap.end)
+    starts: list[int] = [
+        index for index in grid.real_indices() if grid.cells[index] == 0
+    ]
+    return str(shortest_from(steps_to_end, starts))
 
 
+heightmap: HeightMap = parse_heightmap(parsed_data)
 s1_start: float = timer()
-first_star, round_two_data = star_one(parsed_data)
+first_star, round_two_data = star_one(heightmap)
 s1_end: float = timer()
 print(f"The code for the first star: >{first_star}< ({s1_end - s1_start:0.4f} sec)")
 s2_start: float = timer()
-second_star = star_two(parsed_data)
+second_star = star_two(heightmap)
 s2_end: float = timer()
 print(f"The code for the second star: >{second_star}< ({s2_end - s2_start:0.4f} sec)")
@@ -1,83 +1,138 @@
 import pathlib as pl
 from itertools import zip_longest
-from functools import cmp_to_key
 from time import perf_counter as timer
 import re
 
 TOKEN_PATTERN = re.compile(r"(\[|\]|\d+)")
 
 
-def listify(to_parse: str) -> list:
+# A packet is parsed into nested tuples of integers. Tuples rather than lists,
+# so nothing comparing two packets can change them by accident.
+Packet = tuple
+
+
+def listify(to_parse: str) -> Packet:
     retval = []
     stack = [retval]
     tokens = TOKEN_PATTERN.findall(to_parse)
 
     for token in tokens:
         if token == "[":
-            stack[-1].append([])
-            stack.append(stack[-1][-1])
+            stack.append([])
         elif token == "]":
-            stack.pop()
+            finished = tuple(stack.pop())
+            stack[-1].append(finished)
         else:
             stack[-1].append(int(token))
     return retval[0]
 
 
-def check_order(left: str, right: str) -> bool:
-    # print(f"{left} check against {right}")
-    l_struct = listify(left)
-    r_struct = listify(right)
-    l_stack = []
-    r_stack = []
+def compare(left: Packet | int, right: Packet | int) -> int:
+    """Compares two parsed packets (or parts of packets) without changing
+    either. Returns -1 if left comes first, 1 if right comes first and 0 if
+    neither decides the order."""
+    if is_number(left):
+        if is_number(right):
+            return (left > right) - (left < right)
+        left = (left,)
+    elif is_number(right):
+        right = (right,)
+    for l_item, r_item in zip(left, right):
+        result = compare(l_item, r_item)
+        if result != 0:
+            return result
+    return (len(left) > len(right)) - (len(left) < len(right))
+
+
+OPEN, CLOSE, COMMA = b"[],"
+DIGITS = range(ord("0"), ord("9") + 1)
+
+
+def compare_raw(left: bytes, right: bytes) -> int:
+    """Compares two unparsed packets by walking both byte strings side by side,
+    stopping at the first difference. Same results as compare, but without
+    building any nested structure. An integer compared against a list is
+    promoted on the fly: the other side's "[" is consumed and a "]" is owed
+    on this side, to be produced right after the integer itself."""
+    i = j = 0
+    l_owed = r_owed = 0
     while True:
-        if is_stack(l_struct) and is_stack(r_struct):
-            if len(l_struct) == 0 and len(r_struct) == 0:
-                # print('Dropping one stack-level')
-                l_struct = l_stack.pop()
-                r_struct = r_stack.pop()
-                continue
-            if len(l_struct) == 0 or len(r_struct) == 0:
-                return len(l_struct) == 0
-
-        if is_stack(l_struct[0]) and is_stack(r_struct[0]):
-            # print('Rising one stack-level.')
-            l_stack.append(l_struct)
-            r_stack.append(r_struct)
-            l_struct = l_struct.pop(0)
-            r_struct = r_struct.pop(0)
-            continue
-
-        if is_number(l_struct[0]) and is_number(r_struct[0]):
-            # print(f"Number comparison {l_struct[0]} vs {r_struct[0]}")
-            if l_struct[0] == r_struct[0]:
-                l_struct.pop(0)
-                r_struct.pop(0)
-                continue
-            return l_struct[0] < r_struct[0]
-
-        if is_number(l_struct[0]):
-            # print(f"Stacking {l_struct[0]} left.")
-            l_struct[0] = [l_struct[0]]
-            continue
-        elif is_number(r_struct[0]):
-            # print(f"Stacking {r_struct[0]} right.")
-            r_struct[0] = [r_struct[0]]
-            continue
-        # print("One stack exhausted.")
-        return len(l_struct) < len(r_struct)
-
-
-def is_stack(item: list | int) -> bool:
-    return isinstance(item, list)
-
-
-def is_number(item: list | int) -> bool:
+        # An owed "]" is due once the promoted integer has been read, which
+        # is exactly when the cursor has moved off it.
+        if l_owed and left[i] not in DIGITS:
+            l_token = CLOSE
+        else:
+            if left[i] == COMMA:
+                i += 1
+            l_token = left[i]
+        if r_owed and right[j] not in DIGITS:
+            r_token = CLOSE
+        else:
+            if right[j] == COMMA:
+                j += 1
+            r_token = right[j]
+
+        if l_token == CLOSE or r_token == CLOSE:
+            if l_token != r_token:
+                # One list ran out before the other.
+                return -1 if l_token == CLOSE else 1
+            if l_owed and left[i] not in DIGITS:
+                l_owed -= 1
+            else:
+                i += 1
+            if r_owed and right[j] not in DIGITS:
+                r_owed -= 1
+            else:
+                j += 1
+            if i == len(left) and j == len(right):
+                return 0
+        elif l_token == OPEN and r_token == OPEN:
+            i += 1
+            j += 1
+        elif l_token == OPEN:
+            i += 1
+            r_owed += 1
+        elif r_token == OPEN:
+            j += 1
+            l_owed += 1
+        else:
+            l_end = i + 1
+            while left[l_end] in DIGITS:
+                l_end += 1
+            r_end = j + 1
+            while right[r_end] in DIGITS:
+                r_end += 1
+            l_value = int(left[i:l_end])
+            r_value = int(right[j:r_end])
+            if l_value != r_value:
+                return -1 if l_value < r_value else 1
+            i, j = l_end, r_end
+
+
+def is_number(item: Packet | int) -> bool:
     return isinstance(item, int)
 
 
-def grouper(iterable, count: int):
+def rank_packets(packets: list[Packet], probes: list[Packet]) -> list[int]:
+    """Finds where each probe packet would end up (counting from 1) if the
+    packets and all probes were sorted together, without sorting anything.
+    Each probe's position is one more than the number of packets and other
+    probes that come before it."""
+    ranks = [1] * len(probes)
+    for packet in packets:
+        for index, probe in enumerate(probes):
+            if compare(packet, probe) < 0:
+                ranks[index] += 1
+    for index, probe in enumerate(probes):
+        for other in probes:
+            if compare(other, probe) < 0:
+                ranks[index] += 1
+    return ranks
+
+
+def grouper(iterable, count: int, fillvalue=None):
     iterators = [iter(iterable)] * count
-    return zip_longest(*iterators, fillvalue="")
+    return zip_longest(*iterators, fillvalue=fillvalue)
 
 
 my_dir: pl.Path = pl.Path(__file__).parent
@@ -86,28 +141,42 @@ with open(my_dir / "input.txt") as input_file:
     parsed_data = [line.strip() for line in input_file]
 
 
+# quick test; both comparisons should agree with the known order of the
+# example pairs.
+EXAMPLE_PAIRS: list[tuple[str, str, bool]] = [
+    ("[1,1,3,1,1]", "[1,1,5,1,1]", True),
+    ("[[1],[2,3,4]]", "[[1],4]", True),
+    ("[9]", "[[8,7,6]]", False),
+    ("[[4,4],4,4]", "[[4,4],4,4,4]", True),
+    ("[7,7,7,7]", "[7,7,7]", False),
+    ("[]", "[3]", True),
+    ("[[[]]]", "[[]]", False),
+    ("[1,[2,[3,[4,[5,6,7]]]],8,9]", "[1,[2,[3,[4,[5,6,0]]]],8,9]", False),
+]
+for raw_left, raw_right, in_order in EXAMPLE_PAIRS:
+    parsed_order = compare(listify(raw_left), listify(raw_right)) < 0
+    raw_order = compare_raw(raw_left.encode(), raw_right.encode()) < 0
+    if parsed_order != in_order or raw_order != in_order:
+        print(f"ERROR! wrong order for {raw_left} vs {raw_right}")
+
+
 def star_one(data: list[str]) -> str:
     # 6640 too high
     valids: list[int] = []
     for index, (left, right, _) in enumerate(grouper(data, 3), start=1):
-        if check_order(left, right):
+        # Each pair is only compared once, so compare the raw text.
+        if compare_raw(left.encode(), right.encode()) < 0:
             valids.append(index)
     return str(sum(valids))
 
 
 def star_two(data: list[str]) -> str:
     # 23086 too high
-    def comparison(left, right) -> int:
-        if check_order(left, right):
-            return -1
-        return 1
-
-    clean_data = [line for line in data if line != ""]
-    clean_data.append("[[2]]")
-    clean_data.append("[[6]]")
-    clean_data.sort(key=cmp_to_key(comparison))
-    index_a = clean_data.index("[[2]]") + 1
-    index_b = clean_data.index("[[6]]") + 1
+    dividers = [listify("[[2]]"), listify("[[6]]")]
+    # Star one works on the raw text, so this is the only place packets get
+    # parsed; each one exactly once.
+    packets = [listify(line) for line in data if line != ""]
+    index_a, index_b = rank_packets(packets, dividers)
     return str(index_a * index_b)
 
 
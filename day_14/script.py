@@ -2,19 +2,55 @@ from collections import namedtuple
 import pathlib as pl
 from time import perf_counter as timer
 import re
-from typing import Iterator
-
-# Save walls (and settled sand) as a list-of-sets. Index in list is vertical
-# value, each set contains the horizontal coordinates.
-Solids = list[set[int]]
-Point = namedtuple("Point", "x y")
+import sys
 
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common.grid import Grid
 
-class IntegerSet(set):
-    """Spoofed "set" that says it contains *all* integers."""
+Point = namedtuple("Point", "x y")
+# Cell contents in the cave grid.
+EMPTY = 0
+WALL = 1
+SAND = 2
+DROP_POINT = Point(500, 0)
+
+
+class Cave(Grid):
+    """The cave as a dense grid, one byte per cell, row after row. The grid is
+    wide enough to hold the full triangle that sand can spread into from the
+    drop point, so nothing ever has to be checked against the sides."""
+
+    def __init__(self, walls: list[tuple[Point, Point]], floor: bool):
+        deepest = max(max(a.y, b.y) for a, b in walls)
+        # Sand can settle at most one row above the floor, two below the
+        # deepest wall. Without a floor, anything past the deepest wall falls
+        # out of the bottom.
+        height = deepest + 3 if floor else deepest + 1
+        self.floor: bool = floor
+        left = min(min(a.x, b.x) for a, b in walls)
+        right = max(max(a.x, b.x) for a, b in walls)
+        # Each row down, sand can drift at most one step sideways.
+        left = min(left, DROP_POINT.x - height) - 1
+        right = max(right, DROP_POINT.x + height) + 1
+        super().__init__(right - left + 1, height, EMPTY, left=left)
+        for a, b in walls:
+            if a.y == b.y:
+                start = self.index(min(a.x, b.x), a.y)
+                end = self.index(max(a.x, b.x), a.y) + 1
+                self.cells[start:end] = bytes([WALL]) * (end - start)
+            else:
+                start = self.index(a.x, min(a.y, b.y))
+                end = self.index(a.x, max(a.y, b.y)) + 1
+                self.cells[start : end : self.stride] = bytes([WALL]) * (
+                    abs(a.y - b.y) + 1
+                )
+        if floor:
+            start = self.index(left, self.top + height - 1)
+            self.cells[start : start + self.width] = bytes([WALL]) * self.width
 
-    def __contains__(self, __o: object) -> bool:
-        return isinstance(__o, int)
+    def __contains__(self, point: Point) -> bool:
+        """True if the given point is taken up by either wall or sand."""
+        return self.cells[self.index(*point)] != EMPTY
 
 
 my_dir: pl.Path = pl.Path(__file__).parent
@@ -28,8 +64,9 @@ def sliding_window(iterable, count):
     return zip(*iterators)
 
 
-def parse_solids(data: list[str]) -> Solids:
-    all_points = set()
+def parse_walls(data: list[str]) -> list[tuple[Point, Point]]:
+    """Returns every straight wall segment in the input, as (start, end)."""
+    retval: list[tuple[Point, Point]] = []
     point_patt = re.compile(r"(\d+),(\d+)")
     for line in data:
         # Each line has at least two and at most infinity coordinates.
@@ -37,86 +74,143 @@ def parse_solids(data: list[str]) -> Solids:
         for start, end in sliding_window(points, 2):
             a: Point = Point(int(start[0]), int(start[1]))
             b: Point = Point(int(end[0]), int(end[1]))
-            all_points.update(line_iterator(a, b))
-    height = max(all_points, key=lambda pt: pt.y)
-    retval: list[set[int]] = [set() for _ in range(height.y + 1)]
-    for point in all_points:
-        retval[point.y].add(point.x)
+            retval.append((a, b))
     return retval
 
 
-def print_sand(walls: Solids, sands: Solids) -> None:
-    height = len(walls)
-    left = min(sands[height - 2])
-    right = max(sands[height - 2])
-    print(f"Visible height: {height}. Visible width:{left}-{right}")
-    for y, (wall, sand) in enumerate(zip(walls, sands)):
+def parse_solids(data: list[str], floor: bool = False) -> Cave:
+    return Cave(parse_walls(data), floor)
+
+
+def print_sand(cave: Cave) -> None:
+    # Only show the columns that have anything in them, ignoring the floor.
+    last_row = cave.height - 1 if cave.floor else cave.height
+    used = [
+        x
+        for x in range(cave.left, cave.left + cave.width)
+        if any(
+            cave.cells[cave.index(x, y)] for y in range(cave.top, cave.top + last_row)
+        )
+    ]
+    left = used[0]
+    right = used[-1]
+    print(f"Visible height: {cave.height}. Visible width:{left}-{right}")
+    symbols = {WALL: "#", SAND: "O"}
+    for y in range(cave.height):
         line = ">"
         for x in range(left - 1, right + 2):
-            if x in wall:
-                line += "#"
-            elif x in sand:
-                line += "O"
-            elif y == 0 and x == 500:
+            cell = cave.cells[cave.index(x, y)]
+            if cell == EMPTY and y == DROP_POINT.y and x == DROP_POINT.x:
                 line += "+"
             else:
-                line += " "
+                line += symbols.get(cell, " ")
         print(line, "<", sep="")
 
 
-def line_iterator(start: Point, end: Point) -> Iterator[Point]:
-    if start.x == end.x:
-        x = start.x
-        y_range = range(min(start.y, end.y), max(start.y, end.y) + 1)
-        return (Point(x, y) for y in y_range)
-    y = start.y
-    x_range = range(min(start.x, end.x), max(start.x, end.x) + 1)
-    return (Point(x, y) for x in x_range)
-
-
-def do_tick(initial_state: Solids, drop_point: Point = Point(500, 0)) -> bool:
-    x, y = drop_point
-    if x in initial_state[0]:
+def do_tick(cave: Cave, drop_point: Point = DROP_POINT) -> bool:
+    cells = cave.cells
+    stride = cave.stride
+    position = cave.index(*drop_point)
+    if cells[position] != EMPTY:
         return False
-    for y, layer in enumerate(initial_state):
-        if y > len(initial_state):
-            return False
-        if x not in layer:
-            y += 1
-            continue
-        if x - 1 not in layer:
-            y += 1
-            x -= 1
-            continue
-        if x + 1 not in layer:
-            y += 1
-            x += 1
-            continue
-        initial_state[y - 1].add(x)
-        return True
+    bottom = cave.index(cave.left, cave.top + cave.height - 1)
+    while position < bottom:
+        below = position + stride
+        if cells[below] == EMPTY:
+            position = below
+        elif cells[below - 1] == EMPTY:
+            position = below - 1
+        elif cells[below + 1] == EMPTY:
+            position = below + 1
+        else:
+            cells[position] = SAND
+            return True
+    # Reached the bottom row without settling; falls into the abyss.
+    return False
+
+
+def fill_cave(cave: Cave, drop_point: Point = DROP_POINT) -> int:
+    """Drops sand until it either falls out of the bottom or blocks the drop
+    point, and returns how many grains settled. Same result as calling do_tick
+    until it returns False, but each grain starts where the previous one was
+    last still free to move: every grain follows the same path as the one
+    before it, up to the spot where that one came to rest. That path is kept
+    on a stack, so no cell is walked through more than a few times."""
+    cells = cave.cells
+    stride = cave.stride
+    bottom = cave.index(cave.left, cave.top + cave.height - 1)
+    sand_dropped: int = 0
+    path: list[int] = []
+    if cells[cave.index(*drop_point)] == EMPTY:
+        path.append(cave.index(*drop_point))
+    while len(path) > 0:
+        position = path[-1]
+        if position >= bottom:
+            # Falls into the abyss, and so will every grain after it.
+            break
+        below = position + stride
+        if cells[below] == EMPTY:
+            path.append(below)
+        elif cells[below - 1] == EMPTY:
+            path.append(below - 1)
+        elif cells[below + 1] == EMPTY:
+            path.append(below + 1)
+        else:
+            cells[position] = SAND
+            sand_dropped += 1
+            path.pop()
+    return sand_dropped
+
+
+# Translation tables between cave rows and strings of bits, for settle_floor.
+BLOCKED_BITS = bytes.maketrans(bytes([EMPTY, WALL, SAND]), b"011")
+BITS_TO_SAND = bytes.maketrans(b"01", bytes([EMPTY, SAND]))
+
+
+def settle_floor(cave: Cave, drop_point: Point = DROP_POINT) -> int:
+    """Works out where all the sand ends up in a cave with a floor without
+    dropping a single grain. Once everything has settled, a cell holds sand
+    exactly when it is open and one of the three cells above it (diagonally
+    left, straight up or diagonally right) holds sand, so the sand can be
+    filled in one row at a time. Each row is handled as a single integer
+    bitmask. Marks the sand in the cave and returns how many cells it fills."""
+    cells = cave.cells
+    width = cave.width
+    row_mask = (1 << width) - 1
+    # Bit 0 is the rightmost cell of a row; the string form puts it last.
+    reachable = 0
+    if cells[cave.index(*drop_point)] == EMPTY:
+        reachable = 1 << (width - 1 - (drop_point.x - cave.left))
+    sand_count: int = 0
+    row_start = cave.index(cave.left, drop_point.y)
+    floor_start = cave.index(cave.left, cave.top + cave.height - 1)
+    # The floor row itself never holds sand.
+    while reachable != 0 and row_start < floor_start:
+        row = cells[row_start : row_start + width]
+        sand_count += reachable.bit_count()
+        sand_row = format(reachable, f"0{width}b").encode().translate(BITS_TO_SAND)
+        cells[row_start : row_start + width] = (
+            int.from_bytes(row, "big") | int.from_bytes(sand_row, "big")
+        ).to_bytes(width, "big")
+        row_start += cave.stride
+        blocked = int(cells[row_start : row_start + width].translate(BLOCKED_BITS), 2)
+        spread = (reachable | (reachable << 1) | (reachable >> 1)) & row_mask
+        reachable = spread & ~blocked
+    return sand_count
 
 
 def star_one(data: list[str]) -> str:
-    walls = parse_solids(data)
-    sand = parse_solids(data)
-    sand_dropped: int = 0
-    while do_tick(sand):
-        sand_dropped += 1
-    print_sand(walls, sand)
+    cave = parse_solids(data)
+    sand_dropped = fill_cave(cave)
+    print_sand(cave)
     return str(sand_dropped)
 
 
 def star_two(data: list[str]) -> str:
-    solids = parse_solids(data)
-    solids.append(set())
-    solids.append(IntegerSet())
-    walls = parse_solids(data)
-    walls.append(set())
-    walls.append(IntegerSet())
-    sand_dropped: int = 0
-    while do_tick(solids):
-        sand_dropped += 1
-    print_sand(walls, solids)
+    cave = parse_solids(data, floor=True)
+    # With a floor in place, nothing needs to be simulated.
+    sand_dropped = settle_floor(cave)
+    print_sand(cave)
     return str(sand_dropped)
 
 
@@ -3,6 +3,18 @@ from dataclasses import dataclass, field
 from time import perf_counter as timer
 import re
 from typing import Iterator
+from array import array
+import multiprocessing as mp
+import sys
+
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common.intervals import IntervalSet
+
+try:
+    import numpy as np
+except ImportError:
+    # Without numpy, points are checked one sensor at a time.
+    np = None
 
 COORDINATE_PATTERN = re.compile(r"x=(-?\d+), y=(-?\d+)")
 
@@ -47,7 +59,7 @@ class Sensor:
         # Closest point on the given height is exactly as far removed from the
         # sensor as its nearest beacon. Return a length-one range.
         if delta_y == self.distance:
-            return s_range(self.x, self.x)
+            return s_range(self.x, self.x + 1)
         # Closest point on the given height is somewhere in the sensor's range.
         remainder = self.distance - delta_y
         return s_range(self.x - remainder, (self.x + remainder + 1))
@@ -67,10 +79,43 @@ class Sensor:
             yield (self.x + remainder, self.y - (y + 1))
 
 
+class SensorArrays:
+    """The positions and ranges of a group of sensors as numpy arrays, for
+    checking many points against all of them at once."""
+
+    # Upper limit on the number of (point, sensor) distances worked out in
+    # one go, to keep the memory use in check for large batches.
+    BATCH_SIZE = 1 << 20
+
+    def __init__(self, data: list[Sensor]):
+        self.x = np.array([sensor.x for sensor in data], dtype=np.int64)
+        self.y = np.array([sensor.y for sensor in data], dtype=np.int64)
+        self.distance = np.array([sensor.distance for sensor in data], dtype=np.int64)
+
+    def covered(self, xs, ys):
+        """Takes arrays of x and y coordinates, and returns a boolean array that
+        is True for each point that is in range of at least one sensor."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        retval = np.empty(len(xs), dtype=bool)
+        step = max(1, self.BATCH_SIZE // max(1, len(self.x)))
+        for start in range(0, len(xs), step):
+            dist_to = np.abs(xs[start : start + step, None] - self.x) + np.abs(
+                ys[start : start + step, None] - self.y
+            )
+            retval[start : start + step] = (dist_to <= self.distance).any(axis=1)
+        return retval
+
+
 # quick test.
 middle = Sensor("x=3, y=3 then x=2, y=2")
 print(middle)
 edge_points = set(middle.outside_border())
+if np is not None:
+    grid_y, grid_x = np.divmod(np.arange(64), 8)
+    in_range = SensorArrays([middle]).covered(grid_x, grid_y).reshape(8, 8)
+else:
+    in_range = [[middle.in_range(x, y) for x in range(8)] for y in range(8)]
 for y in range(8):
     for x in range(8):
         if x == middle.x and y == middle.y:
@@ -79,84 +124,257 @@ for y in range(8):
             print("=", end="")
         elif (x, y) in edge_points:
             print("#", end="")
-        elif middle.in_range(x, y):
+        elif in_range[y][x]:
             print("*", end="")
         else:
             print(".", end="")
     print("")
 
 
-def dedup_ranges(ranges: list[s_range]) -> list[s_range]:
-    left: s_range = ranges[0]
-    retval: list[s_range] = []
-    for right in ranges[1:]:
-        # Discard empty ranges.
-        if right.start == right.end:
-            continue
-        # Merge ranges that start inside other ranges.
-        if right.start <= left.end:
-            left = s_range(left.start, max(left.end, right.end))
-        # If the left and right ranges do not overlap, add the left to the list
-        # and carry on with a 'new' range.
-        else:
-            retval.append(left)
-            left = right
-    retval.append(left)
-    return retval
-
-
-def clamp_range(ranges: list[s_range], extremes: s_range) -> list[s_range]:
-    retval = []
-    for rn in ranges:
-        if rn.start < extremes.start:
-            if rn.end > extremes.start and rn.end < extremes.end:
-                retval.append(s_range(extremes.start, rn.end))
-                continue
-            elif rn.end > extremes.start:
-                return [extremes]
-            else:
-                continue
-        if rn.end > extremes.end:
-            if rn.start < extremes.end:
-                retval.append(s_range(rn.start, extremes.end))
-                continue
-            else:
-                continue
-        retval.append(rn)
-    return retval
-
-
 my_dir: pl.Path = pl.Path(__file__).parent
 parsed_data: list[Sensor] = list()
 with open(my_dir / "input.txt") as input_file:
     parsed_data = [Sensor(line) for line in input_file]
 
 
+def row_intervals(data: list[Sensor], y: int) -> list[s_range]:
+    """The ranges covered by each sensor on the given row, leaving out the
+    sensors that do not reach it, sorted by start."""
+    ranges = [sensor.horizontal_range(y) for sensor in data]
+    ranges = [rn for rn in ranges if rn.start != rn.end]
+    ranges.sort()
+    return ranges
+
+
+def row_coverage(
+    data: list[Sensor], y: int, limits: s_range | None = None
+) -> IntervalSet:
+    """The positions covered by at least one sensor on the given row,
+    optionally clipped to the given limits."""
+    coverage = IntervalSet()
+    for sensor in data:
+        rn = sensor.horizontal_range(y)
+        coverage.add(rn.start, rn.end)
+    if limits is not None:
+        coverage = coverage.clip(limits.start, limits.end)
+    return coverage
+
+
+def beacon_free_count(data: list[Sensor], y: int) -> int:
+    """Number of positions on the given row where no beacon can be. Positions
+    covered by a sensor that hold a known beacon do not count."""
+    coverage = row_coverage(data, y)
+    beacons = set(sn.beacon_x for sn in data if sn.beacon_y == y)
+    return coverage.total_length() - sum(x in coverage for x in beacons)
+
+
+def coverage_gaps(intervals: list[s_range], limits: s_range) -> list[s_range]:
+    """The parts of the limits not covered by any of the given ranges."""
+    coverage = IntervalSet((rn.start, rn.end) for rn in intervals)
+    return [
+        s_range(start, end) for start, end in coverage.gaps(limits.start, limits.end)
+    ]
+
+
+def rows_still_covered(intervals: list[s_range], limits: s_range) -> int | None:
+    """Given the sorted sensor ranges for a row, returns None if the row has a
+    gap inside the limits. Otherwise, returns how many of the rows right after
+    it are certain to be fully covered as well. Going one row down or up, each
+    end of a sensor's range moves by one. The overlap between two ranges that
+    follow each other can therefore shrink by at most two per row, and the
+    margin past either end of the limits by at most one."""
+    position = limits.start
+    index = 0
+    safe_rows: int | None = None
+    while position < limits.end:
+        # Of all ranges starting at or before the covered position, continue
+        # with the one that reaches the furthest.
+        best: s_range | None = None
+        while index < len(intervals) and intervals[index].start <= position:
+            if best is None or intervals[index].end > best.end:
+                best = intervals[index]
+            index += 1
+        if best is None or best.end <= position:
+            return None
+        if position == limits.start:
+            rows = position - best.start
+        else:
+            rows = (position - best.start) // 2
+        safe_rows = rows if safe_rows is None else min(safe_rows, rows)
+        position = best.end
+    return min(safe_rows, position - limits.end)
+
+
+def find_gaps(
+    data: list[Sensor], rows: range, limits: s_range
+) -> Iterator[tuple[int, list[s_range]]]:
+    """Yields each row in the given range that has positions inside the limits
+    not covered by any sensor, along with those positions. Rows that are fully
+    covered are skipped over in stretches wherever possible."""
+    # Sorted on where each sensor's reach starts, so the ranges for a row come
+    # out nearly sorted already.
+    ordered = sorted(data, key=lambda sn: sn.x - sn.distance)
+    y = rows.start
+    while y < rows.stop:
+        intervals = row_intervals(ordered, y)
+        skip = rows_still_covered(intervals, limits)
+        if skip is None:
+            yield y, coverage_gaps(intervals, limits)
+            y += 1
+        else:
+            y += skip + 1
+
+
+def pack_sensors(data: list[Sensor]) -> array:
+    """Packs the sensors into a flat array of (x, y, distance) triples. That is
+    all a row scan needs, and it is much cheaper to hand to other processes
+    than the Sensor objects."""
+    packed = array("q")
+    for sensor in sorted(data, key=lambda sn: sn.x - sn.distance):
+        packed.extend((sensor.x, sensor.y, sensor.distance))
+    return packed
+
+
+# Set up in each worker process by init_row_worker.
+worker_sensors: array = array("q")
+worker_found = None
+
+
+def init_row_worker(sensors: array, found) -> None:
+    global worker_sensors, worker_found
+    worker_sensors = sensors
+    worker_found = found
+
+
+def scan_row_chunk(
+    task: tuple[int, int, int, int],
+) -> tuple[int, list[tuple[int, int]]] | None:
+    """Worker side of parallel_find_gap. Scans the rows from start up to stop
+    and returns the first one with a gap inside the limits, or None. Gives up
+    early once any worker has found a gap."""
+    start, stop, low, high = task
+    limits = s_range(low, high)
+    sensors = worker_sensors
+    y = start
+    while y < stop:
+        if worker_found.is_set():
+            return None
+        intervals: list[s_range] = []
+        for index in range(0, len(sensors), 3):
+            x, sensor_y, distance = sensors[index : index + 3]
+            remainder = distance - abs(sensor_y - y)
+            if remainder >= 0:
+                intervals.append(s_range(x - remainder, x + remainder + 1))
+        intervals.sort()
+        skip = rows_still_covered(intervals, limits)
+        if skip is None:
+            worker_found.set()
+            gaps = coverage_gaps(intervals, limits)
+            return y, [(rn.start, rn.end) for rn in gaps]
+        y += skip + 1
+    return None
+
+
+def parallel_find_gap(
+    data: list[Sensor],
+    rows: range,
+    limits: s_range,
+    processes: int | None = None,
+    chunks_per_process: int = 16,
+) -> tuple[int, list[s_range]] | None:
+    """Same search as find_gaps, but with the rows split into chunks that are
+    scanned by a pool of worker processes. Returns the first row with a gap
+    any worker finds, along with its gaps, or None if every row is covered.
+    The other workers stop as soon as one finds a gap."""
+    if "fork" not in mp.get_all_start_methods():
+        # Without fork, each worker would re-run this whole script on startup.
+        return next(find_gaps(data, rows, limits), None)
+    context = mp.get_context("fork")
+    processes = processes or mp.cpu_count()
+    chunk_size = max(1, len(rows) // (processes * chunks_per_process))
+    tasks = [
+        (start, min(start + chunk_size, rows.stop), limits.start, limits.end)
+        for start in range(rows.start, rows.stop, chunk_size)
+    ]
+    found = context.Event()
+    with context.Pool(
+        processes, initializer=init_row_worker, initargs=(pack_sensors(data), found)
+    ) as pool:
+        for result in pool.imap_unordered(scan_row_chunk, tasks):
+            if result is not None:
+                y, gaps = result
+                return y, [s_range(start, end) for start, end in gaps]
+    return None
+
+
 def star_one(data: list[Sensor]) -> str:
     critical_height: int = 2000000
     print("sensor count:", len(data))
-    ranges: list[s_range] = [
-        sensor.horizontal_range(critical_height) for sensor in data
-    ]
-    print("range count before deduplication:", len(ranges))
-    ranges.sort()
-    ranges = dedup_ranges(ranges)
-    print("deduped ranges:", *(str(rn) for rn in ranges))
-    return str(sum(rn.end - rn.start for rn in ranges))
+    print(
+        "covered ranges:",
+        *(str(s_range(*rn)) for rn in row_coverage(data, critical_height)),
+    )
+    return str(beacon_free_count(data, critical_height))
+
+
+def boundary_candidates(
+    data: list[Sensor], limits: s_range
+) -> Iterator[tuple[int, int]]:
+    """Yields every point where the just-out-of-range border of one sensor
+    crosses that of another, plus the corners of the search area. If exactly
+    one point in the area is out of range of every sensor, it has to be
+    hemmed in by sensor borders (or the edges of the area) on all sides, so
+    it is one of these. Points on the edges may lie outside the area."""
+    # Each border is made of four diagonal lines. Lines going down-right
+    # satisfy x - y = constant, lines going up-right satisfy x + y = constant.
+    rising: set[int] = set()
+    falling: set[int] = set()
+    for sensor in data:
+        reach = sensor.distance + 1
+        rising.add(sensor.x + sensor.y - reach)
+        rising.add(sensor.x + sensor.y + reach)
+        falling.add(sensor.x - sensor.y - reach)
+        falling.add(sensor.x - sensor.y + reach)
+    for a in rising:
+        for b in falling:
+            # Lines with different parity cross between grid points.
+            if (a - b) % 2 != 0:
+                continue
+            x, y = (a + b) // 2, (a - b) // 2
+            if limits.in_range(x) and limits.in_range(y):
+                yield x, y
+    # A gap against the edge of the area only needs sensor borders on the
+    # other sides, so also check where each border line meets an edge.
+    low, high = limits.start, limits.end - 1
+    for edge in (low, high):
+        for a in rising:
+            yield from ((edge, a - edge), (a - edge, edge))
+        for b in falling:
+            yield from ((edge, edge - b), (b + edge, edge))
+    yield from ((low, low), (low, high), (high, low), (high, high))
 
 
 def star_two(data: list[Sensor]) -> str:
     limits = s_range(0, 4000001)
-    print("Note: This is a very inefficient way of doing things, but it works.")
-    print("Expect this to run for upward of 210 seconds.")
-    for index, sensor in enumerate(data):
-        for x, y in sensor.outside_border():
-            if not limits.in_range(x) or not limits.in_range(y):
-                continue
-            if any(sn.in_range(x, y) for sn in data):
-                continue
-            return str((x * 4000000) + y)
-        print(f"Sensor {index} checked.")
+    candidates = [
+        (x, y)
+        for x, y in boundary_candidates(data, limits)
+        if limits.in_range(x) and limits.in_range(y)
+    ]
+    if np is not None and len(candidates) > 0:
+        xs, ys = np.array(candidates, dtype=np.int64).T
+        free = np.flatnonzero(~SensorArrays(data).covered(xs, ys))
+        if len(free) > 0:
+            return str((int(xs[free[0]]) * 4000000) + int(ys[free[0]]))
+    else:
+        for x, y in candidates:
+            if not any(sn.in_range(x, y) for sn in data):
+                return str((x * 4000000) + y)
+    print("No gap found where the sensor borders cross; sweeping every row.")
+    result = parallel_find_gap(data, range(limits.start, limits.end), limits)
+    if result is not None:
+        y, gaps = result
+        return str((gaps[0].start * 4000000) + y)
 
 
 s1_start: float = timer()
@@ -1,8 +1,15 @@
 import pathlib as pl
-from dataclasses import dataclass, field
-from collections import deque
+from dataclasses import dataclass
+from functools import cache
+from typing import Iterable
 from time import perf_counter as timer
+import multiprocessing as mp
 import re
+import sys
+
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common import search
+from common.search import UNREACHED, AdjacencyGraph
 
 
 
@@ -21,14 +28,6 @@ class Valve:
     def __str__(self)->str:
         return f"Valve {self.name}. Flow rate {self.flow_rate}, connects to valves {', '.join(self.other_valves)}"
 
-
-@dataclass(order=True)
-class NavStep:
-    current_node:str = field(default="",init=True,compare=False)
-    to_visit:set[str] = field(default_factory=set,init=True,compare=False,hash=False)
-    visited:list[str] = field(default_factory=list,init=True,compare=False,hash=False)
-    elephant_visited:list[str] = field(default_factory=list,init=True,compare=False,hash=False)
-
 VALVE_PATTERN = re.compile(r"[A-Z]{2}")
 FLOW_PATTERN = re.compile(r"flow rate=(\d+)")
 my_dir: pl.Path = pl.Path(__file__).parent
@@ -41,17 +40,437 @@ with open(my_dir / "input.txt") as input_file:
         parsed_data.append(Valve(valve_names,flow_rate))
 
 
-def shortest_path(start:str,end:str,connections:dict[str,tuple[str,...]]) -> tuple[str,...]:
-    candidates:deque[list[str]] = deque()
-    candidates.append([start])
-    while len(candidates) > 0:
-        current = candidates.popleft()
-        neighbours = connections[current[-1]]
-        for neigh in neighbours:
-            if neigh not in current:
-                candidates.append([*current,neigh])
-            if neigh == end:
-                return tuple(candidates[-1][1:])
+@dataclass
+class ValveNetwork:
+    """The valves that matter (the start valve plus every valve with a nonzero
+    flow rate), numbered 0 up, with the travel time between every pair of
+    them, or UNREACHED. The start valve is always number 0."""
+    names:list[str]
+    index:dict[str,int]
+    flow_rates:list[int]
+    distances:list[list[int]]
+    moves:list[list[tuple[int,int,int]]]
+    bit_to_valve:dict[int,int]
+    by_flow:list[tuple[int,int]]
+    shortest_hop:int
+
+    def __init__(self,valves:list[Valve],start:str="AA"):
+        #Number every valve, then find the distance from each valve that
+        # matters to every other with one breadth-first search each.
+        all_names = [vl.name for vl in valves]
+        index_of = {name:index for index,name in enumerate(all_names)}
+        graph = AdjacencyGraph(len(valves),((index_of[vl.name],index_of[other],1) for vl in valves for other in vl.other_valves))
+        #Only keep the valves worth opening, plus where we start from.
+        kept = [index_of[start]] + [index_of[vl.name] for vl in valves if vl.flow_rate > 0 and vl.name != start]
+        self.names = [all_names[index] for index in kept]
+        self.index = {name:number for number,name in enumerate(self.names)}
+        self.flow_rates = [valves[index].flow_rate for index in kept]
+        self.distances = []
+        for valve in kept:
+            travel = search.bfs(len(valves),valve,graph.neighbours).distances
+            self.distances.append([travel[other] for other in kept])
+        #For each valve, every other valve worth going to as (bit, minutes to
+        # walk there and open it, flow rate). Valve n is bit 1 << n. Valves
+        # that cannot be reached from here (UNREACHED) are left out.
+        self.moves = [
+            [(1 << target,travel[target] + 1,self.flow_rates[target]) for target in range(1,len(travel)) if target != valve and travel[target] != UNREACHED]
+            for valve,travel in enumerate(self.distances)
+        ]
+        self.bit_to_valve = {1 << valve:valve for valve in range(len(self.names))}
+        #Valves worth opening from most to least flow as (bit, flow rate), and
+        # the fewest minutes it takes to move between two of them and open one.
+        self.by_flow = sorted(((1 << valve,rate) for valve,rate in enumerate(self.flow_rates) if valve > 0),key=lambda item: item[1],reverse=True)
+        self.shortest_hop = min((cost for options in self.moves for _,cost,_ in options),default=2)
+
+
+def best_pressure(network:ValveNetwork,minutes:int=30) -> int:
+    """Most pressure that can be released in the given time, starting from the
+    start valve. Valves are tracked by number and the opened valves as a
+    bitmask, and the best result from every (valve, time left, opened) state
+    is remembered, so each state is only ever worked out once. Opening a valve
+    adds all the pressure it will release until time runs out, so nothing has
+    to be scored afterwards."""
+    moves = network.moves
+    bit_to_valve = network.bit_to_valve
+
+    @cache
+    def best_from(valve:int,time_left:int,opened:int) -> int:
+        best = 0
+        for bit,cost,flow_rate in moves[valve]:
+            if opened & bit or cost >= time_left:
+                continue
+            remaining = time_left - cost
+            released = flow_rate * remaining + best_from(bit_to_valve[bit],remaining,opened | bit)
+            if released > best:
+                best = released
+        return best
+
+    #The start valve counts as opened; its flow rate is 0 anyway, if not, it
+    # would be pointless to walk back to it.
+    return best_from(0,minutes,1)
+
+
+@dataclass
+class SearchStats:
+    expanded:int = 0
+    pruned:int = 0
+
+    def __str__(self)->str:
+        return f"{self.expanded} nodes expanded, {self.pruned} pruned"
+
+
+def pressure_bound(network:ValveNetwork,valve:int,time_left:int,opened:int) -> int:
+    """Optimistic estimate of how much more pressure can be released from the
+    given state: the unopened valves opened in descending order of flow rate,
+    the first as soon as the nearest one could be reached and each next one
+    as soon as the shortest hop in the whole network allows. Never below
+    the real best."""
+    nearest = min((cost for bit,cost,_ in network.moves[valve] if not opened & bit),default=time_left)
+    time_left -= nearest
+    bound = 0
+    for bit,flow_rate in network.by_flow:
+        if time_left <= 0:
+            break
+        if opened & bit:
+            continue
+        bound += flow_rate * time_left
+        time_left -= network.shortest_hop
+    return bound
+
+
+def branch_and_bound(network:ValveNetwork,minutes:int=30) -> tuple[int,SearchStats]:
+    """Depth-first search over the orders of opening valves, dropping every
+    partial path that could not beat the best total found so far, even with
+    pressure_bound's optimistic estimate of what it has left to gain."""
+    moves = network.moves
+    bit_to_valve = network.bit_to_valve
+    stats = SearchStats()
+    best = 0
+    to_check:list[tuple[int,int,int,int]] = [(0,minutes,1,0)]
+    while len(to_check) > 0:
+        valve,time_left,opened,released = to_check.pop()
+        if released + pressure_bound(network,valve,time_left,opened) <= best:
+            stats.pruned += 1
+            continue
+        stats.expanded += 1
+        children = []
+        for bit,cost,flow_rate in moves[valve]:
+            if opened & bit or cost >= time_left:
+                continue
+            remaining = time_left - cost
+            children.append((bit_to_valve[bit],remaining,opened | bit,released + flow_rate * remaining))
+        if len(children) == 0:
+            best = max(best,released)
+            continue
+        #Most promising last, so it gets checked first and raises the bar early.
+        children.sort(key=lambda child: child[3])
+        to_check.extend(children)
+    return best,stats
+
+
+@dataclass
+class AnytimeResult:
+    best:int
+    upper_bound:int
+    complete:bool
+    elapsed:float
+
+    @property
+    def gap(self) -> int:
+        return self.upper_bound - self.best
+
+    def __str__(self)->str:
+        state = "optimal" if self.complete else f"at most {self.gap} below optimal"
+        return f"{self.best} after {self.elapsed:0.4f} sec ({state}, upper bound {self.upper_bound})"
+
+
+def greedy_pressure(network:ValveNetwork,minutes:int=30) -> int:
+    """Quick first answer: keep heading for whichever valve releases the most
+    pressure from here on once opened."""
+    valve,time_left,opened,released = 0,minutes,1,0
+    while True:
+        options = [(flow_rate * (time_left - cost),bit,cost) for bit,cost,flow_rate in network.moves[valve] if not opened & bit and cost < time_left]
+        if len(options) == 0:
+            return released
+        gain,bit,cost = max(options)
+        valve,time_left,opened,released = network.bit_to_valve[bit],time_left - cost,opened | bit,released + gain
+
+
+def beam_pressure(network:ValveNetwork,minutes:int,width:int,deadline:float) -> tuple[int,int|None]:
+    """Breadth-first over the number of valves opened, keeping only the width
+    most promising partial paths (by pressure so far plus pressure_bound) at
+    each step. Returns the best total seen, and an upper bound on the true
+    best: the highest bound among the paths that were dropped, if that beats
+    the best seen. The bound is None if the deadline passed first."""
+    moves = network.moves
+    bit_to_valve = network.bit_to_valve
+    best = 0
+    dropped_bound = 0
+    level:list[tuple[int,int,int,int,int]] = [(0,0,minutes,1,0)]
+    while len(level) > 0:
+        if timer() > deadline:
+            return best,None
+        next_level = []
+        for _,valve,time_left,opened,released in level:
+            for bit,cost,flow_rate in moves[valve]:
+                if opened & bit or cost >= time_left:
+                    continue
+                remaining = time_left - cost
+                total = released + flow_rate * remaining
+                target = bit_to_valve[bit]
+                best = max(best,total)
+                bound = total + pressure_bound(network,target,remaining,opened | bit)
+                if bound > best:
+                    next_level.append((bound,target,remaining,opened | bit,total))
+        if len(next_level) > width:
+            next_level.sort(reverse=True)
+            dropped_bound = max(dropped_bound,next_level[width][0])
+            next_level = next_level[:width]
+        level = next_level
+    return best,max(best,dropped_bound)
+
+
+def anytime_pressure(network:ValveNetwork,minutes:int=30,time_budget:float=1.0) -> AnytimeResult:
+    """Best answer that can be found within the given number of seconds. Starts
+    from the greedy answer, then runs beam searches of doubling width until
+    one of them never has to drop a path (which makes its answer optimal) or
+    the time runs out. Also reports how far off the answer might still be."""
+    start = timer()
+    deadline = start + time_budget
+    best = greedy_pressure(network,minutes)
+    upper_bound = pressure_bound(network,0,minutes,1)
+    width = 1
+    while timer() < deadline:
+        found,bound = beam_pressure(network,minutes,width,deadline)
+        best = max(best,found)
+        if bound is not None:
+            upper_bound = min(upper_bound,max(best,bound))
+        if upper_bound <= best:
+            return AnytimeResult(best,best,True,timer() - start)
+        width *= 2
+    return AnytimeResult(best,upper_bound,False,timer() - start)
+
+
+def best_per_subset(network:ValveNetwork,minutes:int) -> dict[int,int]:
+    """Walks every order of opening valves that fits in the given time, and
+    keeps the most pressure released for each set of opened valves (as a
+    bitmask, without the start valve)."""
+    moves = network.moves
+    bit_to_valve = network.bit_to_valve
+    best:dict[int,int] = {0:0}
+    to_check:list[tuple[int,int,int,int]] = [(0,minutes,0,0)]
+    while len(to_check) > 0:
+        valve,time_left,opened,released = to_check.pop()
+        if best.get(opened,-1) < released:
+            best[opened] = released
+        for bit,cost,flow_rate in moves[valve]:
+            if opened & bit or cost >= time_left:
+                continue
+            remaining = time_left - cost
+            to_check.append((bit_to_valve[bit],remaining,opened | bit,released + flow_rate * remaining))
+    return best
+
+
+#Set up in each worker process by init_subset_worker.
+worker_network:ValveNetwork|None = None
+worker_bound = None
+
+
+def init_subset_worker(network:ValveNetwork,bound) -> None:
+    global worker_network,worker_bound
+    worker_network = network
+    worker_bound = bound
+
+
+def search_subtree(task:tuple[int,int,int,int,bool]) -> dict[int,int]:
+    """Worker side of parallel_best_per_subset: the best-per-subset search
+    from one partial path. With pruning on, branches that cannot beat the
+    best total any worker has found so far are dropped."""
+    valve,time_left,opened,released,prune = task
+    network = worker_network
+    moves = network.moves
+    bit_to_valve = network.bit_to_valve
+    shared = worker_bound.get_obj()
+    lock = worker_bound.get_lock()
+    best:dict[int,int] = dict()
+    to_check = [(valve,time_left,opened,released)]
+    while len(to_check) > 0:
+        valve,time_left,opened,released = to_check.pop()
+        if best.get(opened,-1) < released:
+            best[opened] = released
+        if prune:
+            #Reads skip the lock; a stale value only means pruning a little
+            # less. The lock is only taken to raise the bound.
+            known = shared.value
+            if released > known:
+                with lock:
+                    if released > shared.value:
+                        shared.value = released
+                known = released
+            if released + pressure_bound(network,valve,time_left,opened) <= known:
+                continue
+        for bit,cost,flow_rate in moves[valve]:
+            if opened & bit or cost >= time_left:
+                continue
+            remaining = time_left - cost
+            to_check.append((bit_to_valve[bit],remaining,opened | bit,released + flow_rate * remaining))
+    return best
+
+
+def parallel_best_per_subset(network:ValveNetwork,minutes:int,processes:int|None = None,split_depth:int = 2,prune:bool = False) -> dict[int,int]:
+    """Same table as best_per_subset, with the search split up by the first
+    valves opened (split_depth of them) and the parts spread over a pool of
+    worker processes. With prune set, the workers share the best total found
+    so far and drop branches that cannot beat it; only the overall best entry
+    of the table is then guaranteed, the rest may be missing or too low. With
+    processes set to 1, the parts are worked through in this process."""
+    #The partial paths up to the split depth are handled here, and become the
+    # starting points for the workers.
+    best:dict[int,int] = {0:0}
+    level = [(0,minutes,0,0)]
+    for _ in range(split_depth):
+        next_level = []
+        for valve,time_left,opened,released in level:
+            for bit,cost,flow_rate in network.moves[valve]:
+                if opened & bit or cost >= time_left:
+                    continue
+                remaining = time_left - cost
+                next_level.append((network.bit_to_valve[bit],remaining,opened | bit,released + flow_rate * remaining))
+        for _,_,opened,released in level:
+            if best.get(opened,-1) < released:
+                best[opened] = released
+        level = next_level
+    tasks = [(*start,prune) for start in level]
+    if processes == 1 or "fork" not in mp.get_all_start_methods():
+        #Without fork, each worker would re-run this whole script on startup;
+        # work through the parts here instead.
+        init_subset_worker(network,mp.Value("q",0))
+        parts = map(search_subtree,tasks)
+        return merge_subset_tables(best,parts)
+    context = mp.get_context("fork")
+    bound = context.Value("q",0)
+    with context.Pool(processes,initializer=init_subset_worker,initargs=(network,bound)) as pool:
+        return merge_subset_tables(best,pool.imap_unordered(search_subtree,tasks))
+
+
+def merge_subset_tables(best:dict[int,int],parts:Iterable[dict[int,int]]) -> dict[int,int]:
+    """Adds the best-per-subset tables of the parts into best."""
+    for part in parts:
+        for opened,released in part.items():
+            if best.get(opened,-1) < released:
+                best[opened] = released
+    return best
+
+
+def best_per_budget(network:ValveNetwork,max_minutes:int=30) -> list[dict[int,int]]:
+    """The best-per-subset table of best_per_subset for every time budget up
+    to the given one, from a single search. Entry [minutes] of the result is
+    the table for that many minutes. While walking a path, only the sum of
+    flow rate times opening moment is tracked; the total flow rate is the same
+    for every path that opens the same valves. Within a budget, the best of
+    those paths is then the one with the lowest sum among the ones that are
+    done opening valves in time.
+
+    States are handled minute by minute, and paths that end up at the same
+    valve at the same minute with the same valves open are merged, keeping
+    the lowest sum; whatever follows is the same for all of them. The tables
+    for every budget are filled in once at the end."""
+    moves = network.moves
+    bit_to_valve = network.bit_to_valve
+    flow_rates = network.flow_rates
+    unseen = max_minutes * sum(flow_rates) + 1
+    #states[minutes passed] maps (valve, opened) to the lowest sum of (flow
+    # rate * minute the valve was opened) of the paths that got there.
+    states:list[dict[tuple[int,int],int]] = [dict() for _ in range(max_minutes)]
+    states[0][(0,0)] = 0
+    #lowest[opened][minutes passed] is the lowest sum over every valve.
+    lowest:dict[int,list[int]] = dict()
+    for elapsed,current in enumerate(states):
+        for (valve,opened),weighted in current.items():
+            per_elapsed = lowest.get(opened)
+            if per_elapsed is None:
+                per_elapsed = lowest[opened] = [unseen] * max_minutes
+            if weighted < per_elapsed[elapsed]:
+                per_elapsed[elapsed] = weighted
+            for bit,cost,flow_rate in moves[valve]:
+                if opened & bit or elapsed + cost >= max_minutes:
+                    continue
+                when = elapsed + cost
+                state = (bit_to_valve[bit],opened | bit)
+                now_weighted = weighted + flow_rate * when
+                if states[when].get(state,unseen) > now_weighted:
+                    states[when][state] = now_weighted
+    tables:list[dict[int,int]] = [{0:0} for _ in range(max_minutes + 1)]
+    for opened,per_elapsed in lowest.items():
+        flow = sum(flow_rates[valve] for valve in range(len(flow_rates)) if opened >> valve & 1)
+        #The valve opened last only counts for budgets where it gets to
+        # release something.
+        weighted = unseen
+        for minutes in range(1,max_minutes + 1):
+            weighted = min(weighted,per_elapsed[minutes - 1])
+            if weighted < unseen:
+                tables[minutes][opened] = minutes * flow - weighted
+    return tables
+
+
+def best_within(best:dict[int,int],valve_count:int) -> list[int]:
+    """Turns a best-per-subset table into one listing, for every possible set
+    of valves, the best score that opens only valves from that set."""
+    table = [0] * (1 << valve_count)
+    for opened,released in best.items():
+        table[opened] = released
+    for valve in range(valve_count):
+        bit = 1 << valve
+        for opened in range(len(table)):
+            if opened & bit and table[opened ^ bit] > table[opened]:
+                table[opened] = table[opened ^ bit]
+    return table
+
+
+def best_disjoint_pair(best:dict[int,int],valve_count:int) -> int:
+    """Best total of two workers that never open the same valve, given the
+    best-per-subset table for a single worker."""
+    within = best_within(best,valve_count)
+    #Leave out the start valve, it never gets opened.
+    everything = (1 << valve_count) - 2
+    return max(released + within[everything & ~opened] for opened,released in best.items())
+
+
+def schedule(network:ValveNetwork,budgets:list[int],tables:list[dict[int,int]]|None = None) -> int:
+    """Most pressure that any number of workers can release together, each
+    starting at the start valve with their own number of minutes, and no two
+    opening the same valve. Built from the best-per-subset table of each
+    worker, combined over sets of valves that do not overlap; the cost grows
+    with the number of ways to split the valves (3^n), not with the number
+    of ways to interleave the workers' paths. Takes the result of
+    best_per_budget, if already at hand."""
+    valve_count = len(network.names)
+    everything = (1 << valve_count) - 2
+    if tables is None:
+        tables = best_per_budget(network,max(budgets))
+    if len(budgets) == 1:
+        return max(tables[budgets[0]].values())
+    #combined[valves] is the best the workers so far can do between them,
+    # opening only valves from that set.
+    combined = best_within(tables[budgets[0]],valve_count)
+    for minutes in budgets[1:-1]:
+        added = [0] * len(combined)
+        for opened,released in tables[minutes].items():
+            #Every set of valves that includes this worker's valves, split
+            # into this worker's part and what is left for the others.
+            free = everything & ~opened
+            others = free
+            while True:
+                total = released + combined[others]
+                if total > added[opened | others]:
+                    added[opened | others] = total
+                if others == 0:
+                    break
+                others = (others - 1) & free
+        combined = added
+    #The last worker only needs to be matched against the full set.
+    return max(released + combined[everything & ~opened] for opened,released in tables[budgets[-1]].items())
+
 
 def sliding_window(start:list,size=2):
     iterators = [iter(start[x:]) for x in range(size)]
@@ -100,107 +519,57 @@ if score_path(example_2_path,test_valves,26)+score_path(example_2_elephant,test_
 else:
     print("Sanity test 2 OK")
 
-def star_one(data: list[Valve]) -> tuple[str,dict[tuple[str,str],list[str]]]:
-    #1820 too low
-    #Dictionary for valve-to-valve paths. Since the fastest route between, say,
-    # AA and ZZ will not change, calculate once and cache the result. Lookups
-    # are cheaper than calculations in this case!
-    path_cache:dict[tuple[str,str],list[str]] = dict()
-    #Convenience lookup table mapping which valves a given valve connects to.
-    connections:dict[str,tuple[str,...]] = {vl.name:tuple(vl.other_valves) for vl in data}
-    #Convenience lookup table to turn a valve name into the associated object.
-    valve_names:dict[str,Valve] = {vl.name:vl for vl in data}
-    
-    #All valves with a flowrate greater than 0; I don't care about valves that,
-    # when opened, do not contribute to the final outcome.
-    good_valves:set[str] = set(vl.name for vl in data if vl.flow_rate > 0)
-
+test_network = ValveNetwork(list(test_valves.values()))
+if best_pressure(test_network) != 1651 or branch_and_bound(test_network)[0] != 1651:
+    print("ERROR! failed bitmask solver test.")
+else:
+    print("Sanity test 3 OK")
 
-    #Set of all total flow-sums. When a path is calculated, the score for that
-    # path is added to this set.
-    paths_found:set[int] = set()
-    #Stack of all partially explored paths.
-    to_check:deque[NavStep] = deque([NavStep(current_node="AA",to_visit=good_valves,visited=["AA"])])
-    current:NavStep = None
+if best_disjoint_pair(best_per_subset(test_network,26),len(test_network.names)) != 1707 or schedule(test_network,[26,26]) != 1707:
+    print("ERROR! failed subset table test.")
+else:
+    print("Sanity test 4 OK")
 
-    stack_depth = 0
+test_tables = best_per_budget(test_network,30)
+if any(test_tables[minutes] != best_per_subset(test_network,minutes) for minutes in range(1,31)):
+    print("ERROR! failed multi-budget test.")
+else:
+    print("Sanity test 5 OK")
 
-    while len(to_check) > 0:
-        stack_depth = max(stack_depth,len(to_check))
-        current = to_check.pop()
-        start:str=current.current_node
-        for end in current.to_visit:
-            if (start,end) not in path_cache:
-                found_path = shortest_path(start,end,connections)
-                path_cache[start,end] = found_path
-
-            full_path = [*current.visited,*path_cache[start,end],"valve"]
-
-            remaining_valves = set(current.to_visit)
-            remaining_valves.remove(end)
-
-            time = len(full_path)
-            if time >= 31 or len(remaining_valves) == 0:
-                ps = score_path(full_path,valve_names)
-                paths_found.add(ps)
-                continue
-            to_check.append(NavStep(end,remaining_valves,full_path))
-    print("Stack depth:",stack_depth)
-    return str(max(paths_found)),path_cache
+test_anytime = anytime_pressure(test_network)
+if test_anytime.best != 1651 or not test_anytime.complete:
+    print("ERROR! failed anytime test:",test_anytime)
+else:
+    print("Sanity test 6 OK")
 
+#Runs the worker side in this process; starting a pool on every run is not
+# worth it for the example.
+if parallel_best_per_subset(test_network,26,1) != best_per_subset(test_network,26) or max(parallel_best_per_subset(test_network,30,1,prune=True).values()) != 1651:
+    print("ERROR! failed parallel search test.")
+else:
+    print("Sanity test 7 OK")
 
-def star_two(data: list[Valve],path_cache: dict[tuple[str,str],list[str]]) -> str:
-    good_valves = set(vl.name for vl in data if vl.flow_rate > 0)
-    #Convenience lookup table mapping which valves a given valve connects to.
-    connections:dict[str,tuple[str,...]] = {vl.name:tuple(vl.other_valves) for vl in data}
-    #Convenience lookup table to turn a valve name into the associated object.
-    valve_names:dict[str,Valve] = {vl.name:vl for vl in data}
-    to_check:deque[NavStep] = deque()
-    to_check.append(NavStep("AA",good_valves,["AA"],["AA"]))
+def star_one(data: list[Valve]) -> tuple[str,ValveNetwork]:
+    #1820 too low
+    #Travel times between every pair of valves that matter. Since the fastest
+    # route between, say, AA and ZZ will not change, calculate them all once.
+    network = ValveNetwork(data)
+    best,stats = branch_and_bound(network)
+    print("Search:",stats)
+    return str(best),network
 
-    current_step:NavStep = None
-    flow_totals:set[int] = set()
-    loop_counter = 0
 
-    while len(to_check) > 0:
-        current_step = to_check.pop()
-        loop_counter += 1
-        if loop_counter == 10000:
-            loop_counter = 0
-            print(f"Stack size: {len(to_check)}. Paths: {len(current_step.visited)} and {len(current_step.elephant_visited)}. Unchecked: {len(current_step.to_visit)}")
-
-        #Favour the non-elephant 'player'
-        elephant_turn:bool = (len(current_step.visited) > len(current_step.elephant_visited))
-        path_so_far:list[str] = current_step.elephant_visited if elephant_turn else current_step.visited
-        other_path:list[str] = current_step.visited if elephant_turn else current_step.elephant_visited
-
-        current_valve:str = path_so_far[0] if len(path_so_far) == 1 else path_so_far[-2]
-        for target_valve in current_step.to_visit:
-            if (current_valve,target_valve) not in path_cache:
-                pth = shortest_path(current_valve,target_valve,connections)
-                path_cache[current_valve,target_valve] = pth
-            path = path_cache[current_valve,target_valve]
-            full_path = [*path_so_far,*path,"valve"]
-            remaining_valves = set(current_step.to_visit)
-            remaining_valves.remove(target_valve)
-            if (len(full_path) >= 27 and elephant_turn) or len(remaining_valves) == 0:
-                player_score = score_path(other_path,valve_names,26)
-                elephant_score = score_path(full_path,valve_names,26)
-                flow_totals.add(player_score+elephant_score)
-                continue
-            
-            if elephant_turn:
-                to_check.append(NavStep(target_valve,remaining_valves,other_path,full_path))
-            else:
-                to_check.append(NavStep(target_valve,remaining_valves,full_path,other_path))
-    return str(max(flow_totals))
+def star_two(data: list[Valve],network: ValveNetwork) -> str:
+    #The best results for the player and the elephant that open different
+    # valves, each with 26 minutes.
+    return str(schedule(network,[26,26]))
 
 
 s1_start: float = timer()
-first_star,cache = star_one(parsed_data)
+first_star,network = star_one(parsed_data)
 s1_end: float = timer()
 print(f"The code for the first star: >{first_star}< ({s1_end - s1_start:0.4f} sec)")
 s2_start: float = timer()
-second_star = star_two(parsed_data,cache)
+second_star = star_two(parsed_data,network)
 s2_end: float = timer()
 print(f"The code for the second star: >{second_star}< ({s2_end - s2_start:0.4f} sec)")
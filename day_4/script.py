@@ -1,6 +1,10 @@
 import pathlib as pl
 from dataclasses import dataclass
 from time import perf_counter as timer
+import sys
+
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common.intervals import IntervalSet
 
 
 @dataclass(frozen=True, repr=True)
@@ -10,26 +14,20 @@ class PairJob:
     second_elf_start: int
     second_elf_end: int
 
+    # The job ranges include their end, the interval sets do not.
+    def first_elf(self) -> IntervalSet:
+        return IntervalSet([(self.first_elf_start, self.first_elf_end + 1)])
+
+    def second_elf(self) -> IntervalSet:
+        return IntervalSet([(self.second_elf_start, self.second_elf_end + 1)])
+
     def has_full_overlap(self) -> bool:
-        length_a = self.first_elf_end - self.first_elf_start
-        length_b = self.second_elf_end - self.second_elf_start
-        if length_a < length_b:
-            # first elf is elf A.
-            return (
-                self.first_elf_start >= self.second_elf_start
-                and self.first_elf_end <= self.second_elf_end
-            )
-        # Second elf is elf A, or both have same range.
-        return (
-            self.second_elf_start >= self.first_elf_start
-            and self.second_elf_end <= self.first_elf_end
-        )
+        return self.first_elf().covers(
+            self.second_elf_start, self.second_elf_end + 1
+        ) or self.second_elf().covers(self.first_elf_start, self.first_elf_end + 1)
 
     def has_any_overlap(self) -> bool:
-        min_start = min(self.first_elf_start, self.second_elf_start)
-        if min_start == self.first_elf_start:
-            return self.second_elf_start <= self.first_elf_end
-        return self.first_elf_start <= self.second_elf_end
+        return self.first_elf().overlaps(self.second_elf_start, self.second_elf_end + 1)
 
 
 # Possible situations:
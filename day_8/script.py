@@ -1,10 +1,16 @@
 import pathlib as pl
 from time import perf_counter as timer
 from itertools import product
+from collections.abc import Sequence
+import sys
+
+sys.path.append(str(pl.Path(__file__).parent.parent))
+from common.grid import Grid
 
 #Remember our conversation about type hints? This here is a "type alias," 
 # basically a more convenient way to write out a complex type. In this case,
-# a field is a list containing lists of integers.
+# a field is a list containing lists of integers. Used for the scenic scores,
+# which do not fit in a Grid's bytes.
 Field = list[list[int]]
 
 
@@ -24,22 +30,14 @@ def construct_field(width:int, height:int, list_of_rows:bool=True) -> Field:
     return [[0] * height for _ in range(width)]
 
 
-def parse_field(raw_data: list[str]) -> tuple[Field, Field]:
+def parse_field(raw_data: list[str]) -> Grid:
     """Takes a representation of a field in the form of a list of strings where
     each string is a single row and each character is a single cell-value. Returns
-    both the row-order field and the column-order field."""
-    height = len(raw_data)
-    width = len(raw_data[0])
-    rows: Field = construct_field(width, height, True)
-    columns: Field = construct_field(width, height, False)
-    for y, row in enumerate(raw_data):
-        for x, cell in enumerate(row):
-            rows[y][x] = int(cell)
-            columns[x][y] = int(cell)
-    return rows, columns
-
-
-def scan_line_visible(raw_data: list[int]) -> list[bool]:
+    a Grid, which can hand out both rows and columns without copying them."""
+    return Grid.from_lines(raw_data, int)
+
+
+def scan_line_visible(raw_data: Sequence[int]) -> list[bool]:
     """Reads a single line of integer values, then returns a list of booleans
     where any True means the value is visible either from the start or the end
     of the given list. I.E, scan_line_visible([1,2,3,3,3,2,1]) will return [True,
@@ -61,7 +59,7 @@ def scan_line_visible(raw_data: list[int]) -> list[bool]:
     return visible
 
 
-def scan_line_range(raw_data: list[int]) -> list[int]:
+def scan_line_range(raw_data: Sequence[int]) -> list[int]:
     """Reads a single line of integer values, then returns a list of scenic 
     scores for that line."""
     retval = [0] * len(raw_data)
@@ -80,12 +78,12 @@ def scan_line_range(raw_data: list[int]) -> list[int]:
     return retval
 
 
-def merge_bool_fields(rows: Field, columns: Field) -> Field:
-    """Takes two fields of boolean values and constructs a new Field where each
-    cell is False unless that cell was True in either input field."""
-    retval = construct_field(len(columns), len(rows), True)
+def merge_bool_fields(rows: Field, columns: Field) -> Grid:
+    """Takes two fields of boolean values and constructs a new Grid where each
+    cell is 0 unless that cell was True in either input field."""
+    retval = Grid(len(columns), len(rows))
     for x, y in product(range(len(columns)), range(len(rows))):
-        retval[y][x] = rows[y][x] or columns[x][y]
+        retval[x, y] = rows[y][x] or columns[x][y]
     return retval
 
 
@@ -98,37 +96,37 @@ def merge_int_fields(rows: Field, columns: Field) -> Field:
     return retval
 
 
-def print_bool_field(to_show: Field) -> None:
-    """prints a representation of a Field where any Truthy value is represented
+def print_bool_field(to_show: Grid) -> None:
+    """prints a representation of a Grid where any Truthy value is represented
     by an X and all other values are represented by a space."""
-    for line in to_show:
+    for line in to_show.rows():
         print("".join("X" if cell else " " for cell in line))
 
 
-def star_one(data: list[str]) -> tuple[str, Field, Field]:
+def star_one(data: list[str]) -> tuple[str, Grid]:
     # 2020 too high
-    row_order, col_order = parse_field(data)
-    row_visible = [scan_line_visible(row) for row in row_order]
-    col_visible = [scan_line_visible(col) for col in col_order]
+    field = parse_field(data)
+    row_visible = [scan_line_visible(row) for row in field.rows()]
+    col_visible = [scan_line_visible(col) for col in field.columns()]
     visible_trees = merge_bool_fields(row_visible, col_visible)
     print_bool_field(visible_trees)
-    #Returning the parsed fields, since they will be needed for the 2nd star.
-    return str(sum(sum(row) for row in visible_trees)), row_order, col_order
+    #Returning the parsed field, since it will be needed for the 2nd star.
+    return str(sum(visible_trees.cells)), field
 
 
-def star_two(rows: Field, columns: Field) -> str:
+def star_two(field: Grid) -> str:
     # 168000 too low
-    row_ranges = [scan_line_range(row) for row in rows]
-    col_ranges = [scan_line_range(col) for col in columns]
+    row_ranges = [scan_line_range(row) for row in field.rows()]
+    col_ranges = [scan_line_range(col) for col in field.columns()]
     scores = merge_int_fields(row_ranges, col_ranges)
     return str(max(max(row) for row in scores))
 
 
 s1_start: float = timer()
-first_star, rows, cols = star_one(parsed_data)
+first_star, field = star_one(parsed_data)
 s1_end: float = timer()
 print(f"The code for the first star: >{first_star}< ({s1_end - s1_start:0.4f} sec)")
 s2_start: float = timer()
-second_star = star_two(rows, cols)
+second_star = star_two(field)
 s2_end: float = timer()
 print(f"The code for the second star: >{second_star}< ({s2_end - s2_start:0.4f} sec)")